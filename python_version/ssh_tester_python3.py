@@ -5,11 +5,19 @@ SSH Tester v3 — GUI com splash + about + autenticação robusta
 - Conecta em SSH, autentica (password / fallback keyboard-interactive), executa comando opcional
 - Tela de boas-vindas (splash)
 - Exporta resultados em CSV
+- Motores de varredura: pool de threads ou asyncio (milhares de hosts em voo)
+- Modo headless (--headless) e benchmark de motores (--bench)
 Requer: paramiko
 """
 
-import os, sys, csv, queue, socket, tempfile, base64, threading, time
-from concurrent.futures import ThreadPoolExecutor
+import os, sys, io, csv, queue, socket, tempfile, base64, threading, time
+import asyncio, argparse, functools, selectors, errno, math, ipaddress, hashlib, hmac, re, struct, weakref, signal
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
@@ -34,6 +42,9 @@ try:
     import paramiko
 except Exception as e:
     raise SystemExit("Paramiko é obrigatório. Instale com:  pip install paramiko\n\n"+str(e))
+# erros por host já vão para o resultado; sem handler o logging do paramiko cai no stderr
+import logging
+logging.getLogger("paramiko").addHandler(logging.NullHandler())
 
 # Timeouts razoáveis
 CONNECT_TIMEOUT = 12.0
@@ -42,6 +53,81 @@ READ_TIMEOUT    = 12.0
 MAX_WORKERS_DEFAULT = 10
 DEFAULT_PORT = 22
 
+# Motor asyncio: conexões TCP/banner simultâneas e limite de bytes até achar "SSH-"
+ASYNC_IN_FLIGHT_DEFAULT = 2000
+BANNER_MAX_BYTES = 8192
+# Pré-filtro (selectors): sockets simultâneos no estágio connect+banner
+PREFILTER_IN_FLIGHT = 5000
+# Concorrência adaptativa: limites padrão da janela e parâmetros do controle
+ADAPT_MIN_DEFAULT = 4
+ADAPT_MAX_DEFAULT = 500
+ADAPT_DECREASE = 0.7          # fator do corte multiplicativo
+ADAPT_TIMEOUT_RATE = 0.25     # taxa de timeouts (EWMA) que indica congestionamento
+ADAPT_LATENCY_FACTOR = 2.0    # connect / menor connect da mesma sub-rede, suavizado
+ADAPT_LATENCY_FLOOR_MS = 5.0  # piso da latência-base (LAN/loopback)
+ADAPT_SUBNETS_MAX = 65536     # sub-redes com latência-base guardada (as mais antigas saem)
+ADAPT_EWMA = 0.1
+ADAPT_EPOCH_S = 1.0
+# Motor de threads: testes prontos na fila do pool além dos que estão em execução
+READY_QUEUE = 16
+
+ERR_TIMEOUT = "Timeout de conexão"
+ERR_CANCELLED = "Cancelado"
+CANCEL_GRACE = 0.5   # s que o motor espera os testes interrompidos antes de devolver o controle
+
+# DNS: pool de consultas, cache (TTL fixo; falhas por menos tempo) e alvos resolvidos à frente
+DNS_WORKERS = 32
+DNS_CACHE_TTL = 300.0
+DNS_NEGATIVE_TTL = 30.0
+DNS_CACHE_MAX = 100_000
+DNS_LOOKAHEAD = 2000
+# Dedup: servidores lembrados (endereço, host key, resultado); acima disto saem os mais antigos
+DEDUP_MAX = 100_000
+# Alvos lidos à frente por uma thread para os motores de event loop/selector
+FEED_AHEAD = 1024
+
+# Lista de alvos: arquivos acima disto são lidos sob demanda (a caixa de texto só mostra a prévia)
+IMPORT_INLINE_MAX = 256 * 1024
+IMPORT_PREVIEW_LINES = 50
+# GUI: resultados aplicados em lotes com orçamento por tick; o que sobra espera o próximo tick
+FRAME_BUDGET_S = 0.008
+POLL_IDLE_MS = 100    # fila vazia
+POLL_BUSY_MS = 4      # sobrou fila: volta logo, mas o Tk trata eventos e redesenha entre os lotes
+STATUS_EVERY_S = 0.25
+FILTER_DEBOUNCE_MS = 150   # o filtro só é aplicado quando a digitação pausa
+
+# Prazos por fase (s) e teto total por host; o watchdog aborta o socket ao estourar
+DNS_TIMEOUT  = 5.0
+HOST_TIMEOUT = 60.0
+PHASES = ("dns", "connect", "banner", "kex", "auth", "command")
+PHASE_BUDGETS = {"dns": DNS_TIMEOUT, "connect": CONNECT_TIMEOUT, "banner": READ_TIMEOUT,
+                 "kex": READ_TIMEOUT, "auth": AUTH_TIMEOUT, "command": READ_TIMEOUT}
+CONGESTION_PHASES = ("connect", "banner", "kex")   # timeouts que indicam rede saturada
+# Modos: "full" autentica; "methods" para após a sonda auth "none" (lista de métodos);
+# "banner" só lê a identificação SSH- e fecha, sem KEX
+SCAN_MODES = ("full", "methods", "banner")
+PROBE_USERNAME = "ssh-tester"   # usuário da sonda quando nenhum foi informado
+DEDUP_MODES = ("off", "addr", "key")   # um teste por endereço+porta / também por host key
+
+# Perfis de algoritmos do Transport (ordem de preferência; o que o paramiko não tiver é ignorado).
+# "fastest": curvas e AES-GCM primeiro, sem DH de primo grande (group16/gex) nem CBC/3DES;
+# "compat": ordem padrão do paramiko seguida de tudo o que ele suporta (legado incluído).
+ALGO_PROFILES = {
+    "default": None,
+    "fastest": {
+        "kex": ("curve25519-sha256@libssh.org", "curve25519-sha256", "ecdh-sha2-nistp256",
+                "ecdh-sha2-nistp384", "ecdh-sha2-nistp521", "diffie-hellman-group14-sha256"),
+        "ciphers": ("chacha20-poly1305@openssh.com", "aes128-gcm@openssh.com", "aes256-gcm@openssh.com",
+                    "aes128-ctr", "aes256-ctr"),
+        "key_types": ("ssh-ed25519", "ecdsa-sha2-nistp256", "ecdsa-sha2-nistp384", "ecdsa-sha2-nistp521",
+                      "rsa-sha2-256", "rsa-sha2-512"),
+        "digests": ("hmac-sha2-256-etm@openssh.com", "hmac-sha2-256", "hmac-sha2-512-etm@openssh.com",
+                    "hmac-sha2-512", "hmac-sha1"),
+    },
+    "compat": "all",
+}
+PHASE_COLUMNS = tuple(f"{p}_ms" for p in PHASES)    # duração de cada fase concluída
+
 # ---------- util: gravar icon base64 para arquivo temporário ----------
 def set_app_icon(win: tk.Tk | tk.Toplevel):
     # Windows: .ico
@@ -57,173 +143,2606 @@ def set_app_icon(win: tk.Tk | tk.Toplevel):
             pass
     # Linux XBM (se existir)
     try:
-        if ICON_XBM_PATH and os.path.exists(ICON_XBM_PATH.replace("@","")):
-            win.iconbitmap(ICON_XBM_PATH)
-    except Exception:
-        pass
+        if ICON_XBM_PATH and os.path.exists(ICON_XBM_PATH.replace("@","")):
+            win.iconbitmap(ICON_XBM_PATH)
+    except Exception:
+        pass
+
+# ---------- Splash Screen ----------
+class Splash(tk.Toplevel):
+    def __init__(self, master, timeout_ms=2000):
+        super().__init__(master)
+        self.overrideredirect(True)
+        self.attributes("-topmost", True)
+        frm = ttk.Frame(self, padding=18)
+        frm.pack(fill="both", expand=True)
+
+        img_lbl = None
+        if SPLASH_PNG_B64:
+            try:
+                import tkinter as tk_
+                img_data = base64.b64decode(SPLASH_PNG_B64)
+                self._splash_img = tk_.PhotoImage(data=img_data)
+                img_lbl = ttk.Label(frm, image=self._splash_img)
+                img_lbl.pack()
+            except Exception:
+                pass
+
+        ttk.Label(frm, text=APP_TITLE, font=("Segoe UI", 16, "bold")).pack(pady=(8, 2))
+        ttk.Label(frm, text=f"Versão {VERSION}  •  {LICENSE}", foreground="#777").pack()
+        ttk.Label(frm, text="Inicializando…", foreground="#555").pack(pady=(6, 0))
+        self.update_idletasks()
+
+        # centraliza
+        w, h = 420, 220
+        sw = self.winfo_screenwidth()
+        sh = self.winfo_screenheight()
+        self.geometry(f"{w}x{h}+{(sw-w)//2}+{(sh-h)//2}")
+        set_app_icon(self)
+
+        # fecha em timeout
+        self.after(timeout_ms, self.destroy)
+
+# ---------- Carregar chave privada (opcional) ----------
+_PEM_KEY_TYPES = {"RSA": "RSAKey", "EC": "ECDSAKey", "DSA": "DSSKey"}
+_OPENSSH_KEY_TYPES = {"ssh-rsa": "RSAKey", "ssh-ed25519": "Ed25519Key", "ssh-dss": "DSSKey"}
+_PKEY_CACHE = {}   # (caminho, mtime, sha256 da senha) -> PKey ou exceção
+_PKEY_LOCK = threading.Lock()
+
+def fresh_error(exc):
+    """Cópia de uma falha guardada em cache: relançar a mesma instância acumularia traceback."""
+    try: return type(exc)(*exc.args)
+    except Exception: return exc
+
+def pkey_class(path: str):
+    """
+    Classe paramiko da chave pelo cabeçalho PEM ("BEGIN RSA PRIVATE KEY") ou, no formato
+    OpenSSH, pelo tipo da chave pública, que fica em claro mesmo com a privada cifrada.
+    None se não der para saber (ex.: PKCS#8).
+    """
+    with open(path, "r", encoding="ascii", errors="ignore") as f:
+        text = f.read()
+    m = re.search(r"-----BEGIN ([A-Z ]*?) ?PRIVATE KEY-----(.*?)-----END", text, re.S)
+    if not m: return None
+    kind, body = m.group(1), m.group(2)
+    if kind != "OPENSSH":
+        return getattr(paramiko, _PEM_KEY_TYPES.get(kind, ""), None)
+    try:
+        data = base64.b64decode("".join(body.split()))
+        magic = b"openssh-key-v1\0"
+        if not data.startswith(magic): return None
+        off = len(magic)
+        for _ in range(3):   # cifra, kdf, opções do kdf
+            off += 4 + struct.unpack(">I", data[off:off+4])[0]
+        off += 4 + 4         # número de chaves, tamanho da chave pública
+        n = struct.unpack(">I", data[off:off+4])[0]
+        ktype = data[off+4:off+4+n].decode()
+    except Exception:
+        return None
+    name = "ECDSAKey" if ktype.startswith("ecdsa-") else _OPENSSH_KEY_TYPES.get(ktype, "")
+    return getattr(paramiko, name, None)
+
+def _read_pkey(path: str, passphrase: str | None):
+    cls = pkey_class(path)
+    if cls:
+        return cls.from_private_key_file(path, password=passphrase or None)
+    # formato não identificado: tenta cada tipo (DSSKey não existe no paramiko >= 4)
+    loaders = [getattr(paramiko, n).from_private_key_file
+               for n in ("RSAKey", "ECDSAKey", "Ed25519Key", "DSSKey") if hasattr(paramiko, n)]
+    last = None
+    for L in loaders:
+        try:
+            return L(path, password=passphrase or None)
+        except Exception as e:
+            last = e
+    raise last or RuntimeError("Falha ao carregar chave privada.")
+
+def load_pkey(path: str, passphrase: str | None):
+    """
+    Chave decifrada uma vez (o KDF bcrypt das chaves OpenSSH custa centenas de ms) e
+    compartilhada por todos os workers do processo; trocar o arquivo (mtime) ou a senha
+    gera nova entrada. Falhas (senha errada) também ficam em cache.
+    """
+    path = os.path.abspath(path)
+    key = (path, os.stat(path).st_mtime_ns, hashlib.sha256((passphrase or "").encode()).hexdigest())
+    with _PKEY_LOCK:   # um só worker decifra; os demais esperam pelo resultado
+        hit = _PKEY_CACHE.get(key)
+        if hit is None:
+            try: hit = _read_pkey(path, passphrase)
+            except Exception as e: hit = e
+            _PKEY_CACHE[key] = hit
+    if isinstance(hit, BaseException): raise fresh_error(hit)
+    return hit
+
+def sha256_fingerprint(key):
+    """Fingerprint no formato do OpenSSH: "SHA256:<base64 sem padding>"."""
+    return "SHA256:" + base64.b64encode(hashlib.sha256(key.asbytes()).digest()).decode().rstrip("=")
+
+# ---------- Host keys (uma entrada por chave distinta) ----------
+class HostKeyTable:
+    """
+    Cada host key distinta guardada uma vez (tipo + blob base64), indexada pelo fingerprint
+    SHA256; os resultados só guardam o fingerprint, a mesma str (sys.intern) para todos os
+    hosts com a chave. counts: hosts por chave, contados onde os resultados chegam (note).
+    Num shard (--processes), fresh junta as chaves novas e o shard as manda ao pai (merge).
+    """
+    def __init__(self):
+        self.keys = {}     # fingerprint -> (tipo, blob base64)
+        self.counts = {}   # fingerprint -> hosts
+        self.fresh = None  # [(fingerprint, tipo, blob)] ainda não enviadas; None fora dos shards
+        self.lock = threading.Lock()
+
+    def intern(self, key):
+        fp = sys.intern(sha256_fingerprint(key))
+        if fp not in self.keys:
+            with self.lock:
+                if fp not in self.keys:
+                    self.keys[fp] = k = (key.get_name(), key.get_base64())
+                    if self.fresh is not None: self.fresh.append((fp,) + k)
+        return fp
+
+    def take_fresh(self):
+        with self.lock:
+            fresh, self.fresh = self.fresh or [], []
+        return fresh
+
+    def merge(self, items):
+        """Chaves vindas de um shard: [(fingerprint, tipo, blob)]."""
+        with self.lock:
+            for fp, ktype, blob in items:
+                self.keys.setdefault(sys.intern(fp), (ktype, blob))
+
+    def note(self, r: dict):
+        """Conta o host na chave do resultado (fingerprint internado) e preenche key_hosts."""
+        fp = r.get("fingerprint")
+        if not fp: return
+        r["fingerprint"] = fp = sys.intern(fp)
+        with self.lock:
+            n = self.counts[fp] = self.counts.get(fp, 0) + 1
+        r["key_hosts"] = n
+
+    def shared(self):
+        """[(fingerprint, hosts)] das chaves vistas em mais de um host, mais comuns primeiro."""
+        with self.lock:
+            return sorted(((fp, n) for fp, n in self.counts.items() if n > 1), key=lambda x: -x[1])
+
+    def export(self, f):
+        """Uma linha por chave, mais comuns primeiro: "tipo blob fingerprint hosts"."""
+        with self.lock:
+            items = sorted(self.keys.items(), key=lambda kv: -self.counts.get(kv[0], 0))
+            counts = dict(self.counts)
+        for fp, (ktype, blob) in items:
+            f.write(f"{ktype} {blob} {fp} {counts.get(fp, 0)}\n")
+        return len(items)
+
+    def clear(self):
+        with self.lock:
+            self.keys.clear(); self.counts.clear()
+
+HOST_KEYS = HostKeyTable()
+
+# ---------- ssh-agent (identidades lidas uma vez por execução) ----------
+class SharedAgent(paramiko.Agent):
+    """Uma conexão com o agente para todos os workers; pedidos de assinatura serializados."""
+    def __init__(self):
+        self._lock = threading.Lock()   # antes do super(): o __init__ já lista as chaves
+        super().__init__()
+
+    def _send_message(self, msg):
+        with self._lock:
+            return super()._send_message(msg)
+
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
+def agent_keys():
+    """Identidades do ssh-agent (SSH_AUTH_SOCK); () sem agente ou se ele não responder."""
+    global _AGENT
+    with _AGENT_LOCK:
+        if _AGENT is None:
+            try: _AGENT = SharedAgent()
+            except Exception: _AGENT = False
+        return _AGENT.get_keys() if _AGENT else ()
+
+def close_agent():
+    """Fecha a conexão; a próxima execução relê a lista de identidades."""
+    global _AGENT
+    with _AGENT_LOCK:
+        if _AGENT: _AGENT.close()
+        _AGENT = None
+
+# ---------- Prazos por fase (DNS, connect, banner, KEX, auth, comando) ----------
+class DeadlineWatchdog:
+    """
+    Uma thread para todos os hosts: roda de tempo (baldes de TICK s) com os HostDeadline
+    ativos; ao vencer o prazo da fase corrente, fecha o socket/Transport do host, o que
+    faz a chamada bloqueada do paramiko no worker retornar com erro.
+    """
+    TICK = 0.05
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.last = int(time.perf_counter() / self.TICK)
+        self.thread = None
+        self.live = weakref.WeakSet()        # todos os HostDeadline ainda não encerrados
+        self.cancelled = threading.Event()   # Parar: prazos novos já nascem cancelados
+
+    def track(self, dl):
+        with self.lock:
+            self.live.add(dl)
+
+    def cancel_all(self):
+        """Parar: aborta agora todos os hosts em andamento (sockets, Transports, esperas)."""
+        self.cancelled.set()
+        with self.lock:
+            live = list(self.live)
+        for dl in live:
+            dl.abort(cancel=True)
+
+    def reset(self):
+        """Início de uma execução: desfaz o cancelamento da anterior."""
+        self.cancelled.clear()
+
+    def watch(self, dl):
+        b = int(dl.deadline / self.TICK) + 1
+        with self.lock:
+            self._discard(dl)
+            self.buckets.setdefault(b, set()).add(dl)
+            dl._bucket = b
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="deadline-watchdog", daemon=True)
+                self.thread.start()
+
+    def unwatch(self, dl):
+        with self.lock:
+            self._discard(dl)
+
+    def _discard(self, dl):
+        if dl._bucket is not None:
+            s = self.buckets.get(dl._bucket)
+            if s:
+                s.discard(dl)
+                if not s: del self.buckets[dl._bucket]
+            dl._bucket = None
+
+    def _run(self):
+        while True:
+            time.sleep(self.TICK)
+            cur = int(time.perf_counter() / self.TICK)
+            due = []
+            with self.lock:
+                for b in range(self.last + 1, cur + 1):
+                    for dl in self.buckets.pop(b, ()):
+                        dl._bucket = None
+                        due.append(dl)
+                self.last = cur
+            for dl in due:
+                dl.abort()
+
+_WATCHDOG = DeadlineWatchdog()
+
+class HostDeadline:
+    """
+    Orçamento de tempo de um host: prazo próprio para cada fase (budgets, em s) e teto
+    total host_timeout contado de `started`. enter(fase) devolve o tempo restante para
+    usar como timeout de socket; se ainda assim a fase estourar, o watchdog aborta as
+    conexões anexadas (attach) e registra a fase em `expired`.
+    Também mede as fases: ao entrar na próxima (ou em complete()) a duração da anterior
+    vai para `phases` (ms).
+    """
+    def __init__(self, budgets=None, host_timeout=HOST_TIMEOUT, started=None):
+        self.budgets = budgets or PHASE_BUDGETS
+        self.started = started or time.perf_counter()
+        self.host_deadline = self.started + host_timeout
+        self.phase = None
+        self.deadline = self.host_deadline
+        self.expired = None
+        self.done = False
+        self.closers = []
+        self.phases = {}
+        self._t_phase = None
+        self._bucket = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+        _WATCHDOG.track(self)
+
+    def _close_phase(self, now):
+        if self.phase and self._t_phase is not None:
+            self.phases[self.phase] = int((now - self._t_phase) * 1000)
+
+    def enter(self, phase):
+        if _WATCHDOG.cancelled.is_set():
+            self.cancelled = True
+            raise ScanCancelled()
+        with self.lock:
+            now = time.perf_counter()
+            self._close_phase(now)
+            self.phase, self._t_phase = phase, now
+            self.deadline = min(now + self.budgets.get(phase, READ_TIMEOUT), self.host_deadline)
+            remaining = self.deadline - now
+        if remaining <= 0:
+            self.expired = phase
+            raise socket.timeout(timeout_error(phase))
+        _WATCHDOG.watch(self)
+        return remaining
+
+    def attach(self, obj):
+        """Socket, Transport ou Event (acordado) a fechar se o prazo estourar ou no Parar."""
+        with self.lock:
+            self.closers.append(obj)
+            late = self.cancelled
+        if late: self.abort(cancel=True)
+
+    def complete(self):
+        """Fase corrente concluída: registra a duração e desarma o prazo."""
+        with self.lock:
+            self._close_phase(time.perf_counter())
+            self.phase = self._t_phase = None
+        _WATCHDOG.unwatch(self)
+
+    def finish(self):
+        with self.lock:
+            self.done = True
+        _WATCHDOG.unwatch(self)
+
+    def timed_out_phase(self, exc=None):
+        """
+        Fase que estourou: abortada pelo watchdog, exceção de timeout na fase corrente ou
+        erro que surgiu com o prazo já vencido (ex.: "Authentication timeout." do paramiko).
+        """
+        if self.expired: return self.expired
+        if isinstance(exc, (socket.timeout, asyncio.TimeoutError)): return self.phase
+        if self.phase and time.perf_counter() >= self.deadline: return self.phase
+        return None
+
+    def abort(self, cancel=False):
+        with self.lock:
+            if self.done: return
+            if cancel: self.cancelled = True
+            elif time.perf_counter() < self.deadline: return
+            else: self.expired = self.phase
+            closers = self.closers[:]
+        for obj in closers:
+            if isinstance(obj, threading.Event):
+                obj.set(); continue
+            try:
+                # shutdown acorda um recv() bloqueado em outra thread; só close() não basta
+                shutdown = getattr(obj, "shutdown", None)
+                if shutdown: shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+            try: obj.close()
+            except Exception: pass
+
+def timeout_error(phase):
+    return ERR_TIMEOUT if phase == "connect" else f"Timeout na fase {phase}"
+
+class ScanCancelled(Exception):
+    """Execução interrompida pelo Parar."""
+    def __init__(self):
+        super().__init__(ERR_CANCELLED)
+
+# ---------- DNS: resolução única por nome (cache, /etc/hosts, deduplicação) ----------
+def _hosts_file():
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32", "drivers", "etc", "hosts")
+    return "/etc/hosts"
+
+def with_port(sockaddr, port):
+    """sockaddr do cache (porta 0) -> endereço de connect; IPv6 mantém flowinfo/scope."""
+    return (sockaddr[0], port) + tuple(sockaddr[2:])
+
+class DnsResolver:
+    """
+    Cada nome é resolvido uma vez: IP literal e /etc/hosts sem consulta; os demais via
+    getaddrinfo num pool de DNS_WORKERS threads. Consultas simultâneas ao mesmo nome
+    compartilham um Future; respostas ficam em cache por DNS_CACHE_TTL (getaddrinfo não
+    expõe o TTL do registro) e falhas por DNS_NEGATIVE_TTL. Endereços guardados sem porta:
+    lista de (family, sockaddr) na ordem do sistema, prontos para o connect (with_port).
+    """
+    def __init__(self, workers=DNS_WORKERS, ttl=DNS_CACHE_TTL, negative_ttl=DNS_NEGATIVE_TTL,
+                 max_entries=DNS_CACHE_MAX):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dns")
+        self.ttl, self.negative_ttl, self.max_entries = ttl, negative_ttl, max_entries
+        self.cache = {}      # nome -> (expira_em, endereços ou exceção)
+        self.pending = {}    # nome -> Future da consulta em andamento
+        self.hosts = None
+        self.lock = threading.Lock()
+
+    def _load_hosts(self):
+        table = {}
+        try:
+            with open(_hosts_file(), "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    parts = line.split("#", 1)[0].split()
+                    if len(parts) < 2: continue
+                    try: addr = self._literal(parts[0].split("%", 1)[0])
+                    except ValueError: continue
+                    for name in parts[1:]:
+                        table.setdefault(name.lower(), []).extend(addr)
+        except OSError:
+            pass
+        return table
+
+    @staticmethod
+    def _literal(host):
+        ip = ipaddress.ip_address(host)
+        if ip.version == 6: return [(socket.AF_INET6, (str(ip), 0, 0, 0))]
+        return [(socket.AF_INET, (str(ip), 0))]
+
+    @staticmethod
+    def _query(host):
+        addrs, seen = [], set()
+        for family, _, _, _, sa in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM):
+            if sa not in seen:
+                seen.add(sa); addrs.append((family, sa))
+        if not addrs:   # nenhum endereço TCP: falha de resolução, não connect sem destino
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return addrs
+
+    def _lookup(self, host):
+        """(endereços, None) do cache/fast path ou (None, Future) da consulta compartilhada."""
+        key = host.strip("[]").lower()
+        with self.lock:
+            hit = self.cache.get(key)
+            if hit and hit[0] > time.monotonic(): return hit[1], None
+            fut = self.pending.get(key)
+            if fut: return None, fut
+            try:
+                return self._literal(key), None
+            except ValueError:
+                pass
+            if self.hosts is None: self.hosts = self._load_hosts()
+            if key in self.hosts: return self.hosts[key], None
+            fut = self.pending[key] = self.pool.submit(self._query, key)
+        fut.add_done_callback(lambda f, key=key: self._store(key, f))
+        return None, fut
+
+    def _store(self, key, fut):
+        exc = fut.exception()
+        with self.lock:
+            self.pending.pop(key, None)
+            if len(self.cache) >= self.max_entries:
+                del self.cache[next(iter(self.cache))]   # o mais antigo inserido
+            self.cache[key] = (time.monotonic() + (self.negative_ttl if exc else self.ttl),
+                               exc or fut.result())
+
+    def resolve(self, host, timeout=DNS_TIMEOUT, stop: threading.Event | None = None):
+        """
+        Lista de (family, sockaddr); gaierror se o nome não existe, socket.timeout no prazo.
+        stop: Event que interrompe a espera (ScanCancelled).
+        """
+        addrs, fut = self._lookup(host)
+        if fut is not None:
+            end = time.perf_counter() + timeout
+            while True:
+                if stop is not None and stop.is_set(): raise ScanCancelled()
+                left = end - time.perf_counter()
+                if left <= 0: raise socket.timeout(timeout_error("dns"))
+                try:
+                    addrs = fut.result(timeout=min(left, 0.1) if stop is not None else left)
+                    break
+                except FutureTimeout:   # no 3.10 não é o TimeoutError embutido
+                    pass
+        if isinstance(addrs, BaseException): raise fresh_error(addrs)
+        return addrs
+
+    def resolve_future(self, host):
+        """Como resolve, mas devolve um Future (já concluído se veio do cache)."""
+        addrs, fut = self._lookup(host)
+        if fut is not None: return fut
+        fut = Future()
+        if isinstance(addrs, BaseException): fut.set_exception(fresh_error(addrs))
+        else: fut.set_result(addrs)
+        return fut
+
+    def prefetch(self, targets, lookahead=DNS_LOOKAHEAD):
+        """Repassa os alvos na ordem, disparando a resolução de até `lookahead` à frente."""
+        ahead = deque()
+        for t in targets:
+            self._lookup(t[0])
+            ahead.append(t)
+            if len(ahead) > lookahead: yield ahead.popleft()
+        yield from ahead
+
+RESOLVER = DnsResolver()
+
+def connect_addrs(addrs, port, deadline, attach=None):
+    """
+    create_connection sem nova resolução: tenta cada endereço até `deadline` (perf_counter).
+    attach: recebe cada socket antes do connect (HostDeadline.attach: Parar/prazo o abortam).
+    """
+    err = None
+    for family, sa in addrs:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0: break
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        if attach: attach(sock)
+        try:
+            sock.settimeout(remaining)
+            sock.connect(with_port(sa, port))
+            return sock
+        except OSError as e:
+            err = e
+            sock.close()
+    if err is None or time.perf_counter() >= deadline:
+        raise socket.timeout(ERR_TIMEOUT)
+    raise err
+
+def connect_error(e):
+    """Falha de connect com o texto do socket bloqueante ("[Errno 111] Connection refused"), não o do asyncio."""
+    return OSError(e.errno, os.strerror(e.errno)) if e.errno else e
+
+# ---------- Perfis de algoritmos (KEX/cifra/host key) ----------
+_ALGO_TABLES = {"kex": "_kex_info", "ciphers": "_cipher_info", "key_types": "_key_info", "digests": "_mac_info"}
+
+def supported_algorithms(tr, kind):
+    """Nomes que este paramiko implementa para kind ("kex", "ciphers", "key_types", "digests")."""
+    return tuple(getattr(tr, _ALGO_TABLES[kind], {}))
+
+def apply_algo_profile(tr, profile):
+    """Aplica ALGO_PROFILES[profile] às preferências do Transport (antes do start_client)."""
+    spec = ALGO_PROFILES.get(profile or "default")
+    if not spec: return
+    so = tr.get_security_options()
+    for kind in _ALGO_TABLES:
+        supported = supported_algorithms(tr, kind)
+        current = getattr(so, kind)
+        if spec == "all":
+            names = tuple(current) + tuple(n for n in supported if n not in current)
+        else:
+            names = tuple(n for n in spec[kind] if n in supported)
+        if names: setattr(so, kind, names)
+
+# ---------- known_hosts (índice montado uma vez por execução) ----------
+class HostKeyError(paramiko.SSHException):
+    """Host key recusada pela verificação; hostkey_status vai para o resultado."""
+    def __init__(self, msg, hostkey_status):
+        super().__init__(msg)
+        self.hostkey_status = hostkey_status
+
+def known_hosts_names(host, port, ip=""):
+    """Nomes como o OpenSSH grava: "host" na porta 22, "[host]:porta" nas demais; IP também."""
+    names = []
+    for n in (host.strip("[]").lower(), ip):
+        if n and n not in names: names.append(n)
+    return [n if port == DEFAULT_PORT else f"[{n}]:{port}" for n in names]
+
+class KnownHostsIndex:
+    """
+    known_hosts lido uma vez. check() -> "match", "mismatch", "unknown", "unverified" ou "revoked":
+    - match: (nome, chave) num set para os nomes em claro; hasheados |1|salt|hmac: um
+      HMAC-SHA1 por linha com aquela chave (uma por host, salvo imagens clonadas);
+    - mismatch/unknown pelos nomes em claro: um lookup no dict;
+    - hasheados sem linha da chave: cada linha tem salt próprio, então separar host novo de
+      chave trocada custa um HMAC por linha do tipo. Só com sweep=True (feito uma vez por
+      (nome, tipo) e guardado); sem ele o resultado é "unverified".
+    TOFU: remember() vale na hora para a execução e só é gravado no arquivo em flush().
+    """
+    def __init__(self, path):
+        self.path = path
+        self.plain = {}        # nome -> {tipo de chave}
+        self.plain_keys = set()  # (nome, base64 da chave)
+        self.hashed = {}       # tipo de chave -> {salt: {hmac}}
+        self.hashed_keys = {}  # base64 da chave -> {salt: {hmac}}
+        self.revoked = set()
+        self.hashed_seen = {}  # cache: (nome, tipo) -> há linha hasheada para o nome
+        self.pending = []    # linhas TOFU ainda não gravadas
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    self._add_line(line)
+        except FileNotFoundError:
+            pass
+
+    def _add_line(self, line):
+        parts = line.split()
+        if len(parts) < 3 or parts[0].startswith("#"): return
+        if parts[0].startswith("@"):
+            if parts[0] == "@revoked" and len(parts) >= 4: self.revoked.add(parts[3])
+            return   # @cert-authority: fora do escopo
+        hosts, ktype, blob = parts[0], parts[1], parts[2]
+        if hosts.startswith("|1|"):
+            try:
+                _, _, salt, digest = hosts.split("|")
+                salt, digest = base64.b64decode(salt), base64.b64decode(digest)
+            except ValueError:
+                return
+            self.hashed.setdefault(ktype, {}).setdefault(salt, set()).add(digest)
+            self.hashed_keys.setdefault(blob, {}).setdefault(salt, set()).add(digest)
+        else:
+            for name in hosts.lower().split(","):
+                self.plain.setdefault(name, set()).add(ktype)
+                self.plain_keys.add((name, blob))
+
+    def check(self, names, ktype, blob, sweep=False):
+        with self.lock:
+            if blob in self.revoked: return "revoked"
+            if any((n, blob) in self.plain_keys for n in names): return "match"
+            keyed = list(self.hashed_keys.get(blob, {}).items())
+        msgs = [n.encode() for n in names]
+        if any(hmac.digest(salt, m, "sha1") in digests for salt, digests in keyed for m in msgs):
+            return "match"
+        with self.lock:
+            if any(ktype in self.plain.get(n, ()) for n in names): return "mismatch"
+            if ktype not in self.hashed: return "unknown"
+            if not sweep: return "unverified"
+            todo = [n for n in names if (n, ktype) not in self.hashed_seen]
+            salts = list(self.hashed[ktype].items()) if todo else ()
+        # fora do lock: a varredura é O(salts) e o resultado fica para os próximos hosts
+        for n in todo:
+            msg = n.encode()
+            self.hashed_seen[(n, ktype)] = any(hmac.digest(salt, msg, "sha1") in digests
+                                               for salt, digests in salts)
+        if any(self.hashed_seen.get((n, ktype)) for n in names): return "mismatch"
+        return "unknown"
+
+    def remember(self, name, ktype, blob):
+        """TOFU: registra já no índice; a linha vai para o arquivo em flush()."""
+        with self.lock:
+            if self.hashed:   # arquivo com nomes hasheados: grava no mesmo formato
+                salt = os.urandom(20)
+                digest = hmac.digest(salt, name.encode(), "sha1")
+                host_field = "|1|%s|%s" % (base64.b64encode(salt).decode(), base64.b64encode(digest).decode())
+            else:
+                host_field = name
+            line = f"{host_field} {ktype} {blob}"
+            self._add_line(line)
+            self.hashed_seen.pop((name, ktype), None)
+            self.pending.append(line)
+
+    def flush(self):
+        with self.lock:
+            lines, self.pending = self.pending, []
+        if not lines: return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:   # uma escrita por lote
+            f.write("".join(l + "\n" for l in lines))
+
+_KNOWN_HOSTS = {}   # (caminho, mtime) -> KnownHostsIndex
+_KNOWN_HOSTS_LOCK = threading.Lock()
+
+def known_hosts_index(path):
+    """Índice do arquivo, montado uma vez por versão (mtime) e compartilhado pelos workers."""
+    path = os.path.abspath(os.path.expanduser(path))
+    try: mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError: mtime = 0
+    with _KNOWN_HOSTS_LOCK:
+        idx = _KNOWN_HOSTS.get((path, mtime))
+        if idx is None:
+            idx = _KNOWN_HOSTS[(path, mtime)] = KnownHostsIndex(path)
+        return idx
+
+def flush_known_hosts():
+    """Grava as entradas TOFU pendentes (fim da execução)."""
+    with _KNOWN_HOSTS_LOCK:
+        indexes = list(_KNOWN_HOSTS.values())
+        _KNOWN_HOSTS.clear()   # o arquivo muda; a próxima execução relê
+    for idx in indexes:
+        idx.flush()
+
+# ---------- Conexão + identificação (bloqueante) ----------
+def open_ident(host, port, dl, addrs=None):
+    """DNS (se addrs for None), connect e leitura da linha SSH- nos prazos de dl: (sock, bytes_lidos, ident)."""
+    if addrs is None:
+        addrs = RESOLVER.resolve(host, dl.enter("dns"), _WATCHDOG.cancelled)
+    dl.enter("connect")
+    try:
+        sock = connect_addrs(addrs, port, dl.deadline, dl.attach)
+    except OSError as e:
+        if e.errno: dl.complete()   # recusa conclui a fase: connect_ms mede até o RST
+        raise
+    sock.settimeout(dl.enter("banner"))
+    prebuf, ident = read_ident(sock)
+    return sock, prebuf, ident
+
+# ---------- Autenticação (prioriza Transport.auth_password) ----------
+from paramiko import AuthenticationException, BadAuthenticationType, SSHException
+
+def probe_auth_methods(tr, username):
+    """
+    Sonda auth "none" logo após o KEX: métodos oferecidos pelo servidor, sem gastar uma
+    tentativa de senha (nem o atraso do PAM). None se o servidor aceitou sem credencial.
+    """
+    try:
+        tr.auth_none(username)
+        return None
+    except AuthenticationException as e:
+        return list(getattr(e, "allowed_types", None) or [])
+
+def _auth_chain(tr, username, password, keys, kbi_enable, allowed=None):
+    """
+    Chaves (arquivo, depois agente) -> password -> keyboard-interactive com a mesma senha,
+    pulando o que o servidor não oferece (sonda auth "none" ou allowed_types da última recusa).
+    keys: [(PKey, rótulo)]. Retorna (método, rótulo da chave) ou relança a última recusa.
+    """
+    last = None
+    for key, label in keys:
+        if allowed is not None and "publickey" not in allowed: break
+        try:
+            rest = tr.auth_publickey(username, key)
+            if tr.is_authenticated(): return "publickey", label
+            allowed = rest   # sucesso parcial: o servidor exige outro fator
+        except SSHException as e:
+            if not tr.is_active(): raise
+            last, allowed = e, getattr(e, "allowed_types", None) or allowed
+    # sem chaves vale o comportamento original: password sempre (mesmo vazia)
+    if (password or not keys) and (allowed is None or "password" in allowed):
+        try:
+            tr.auth_password(username, password or "")
+            return "password", ""
+        except AuthenticationException as e:
+            last, allowed = e, getattr(e, "allowed_types", None) or allowed
+    if kbi_enable and password and "keyboard-interactive" in (allowed or ()):
+        tr.auth_interactive_dumb(username, password)
+        return "keyboard-interactive", ""
+    err = last or BadAuthenticationType("Nenhum método de autenticação disponível", list(allowed or ()))
+    if allowed is not None and not getattr(err, "allowed_types", None):
+        err.allowed_types = allowed   # a recusa final leva a lista da sonda até o resultado
+    raise err
+
+def try_auth_with_fallback(host, port, username, password, pkey_obj,
+                           accept_unknown_hostkey, verify_command, kbi_enable,
+                           sock=None, t0=None, deadline=None, addrs=None, agent_identities=(),
+                           probe_methods=False, methods_only=False, algo_profile=None,
+                           known_hosts=None, tofu=False, known_hosts_sweep=False, claim=None):
+    """
+    Retorna: ok, latency_ms, banner, fingerprint, hostkey_status, auth_method, auth_key, allowed_methods, stdout, stderr
+    fingerprint: SHA256 da host key (a chave completa fica uma vez em HOST_KEYS).
+    auth_key: chave aceita no publickey (fingerprint SHA256; "agent:<fingerprint> <comentário>").
+    probe_methods: sonda auth "none" antes das credenciais (allowed_methods, "none" se
+    o servidor não exige autenticação); methods_only: para após a sonda (ok = métodos obtidos).
+    algo_profile: chave de ALGO_PROFILES (preferências de KEX/cifra/host key).
+    known_hosts/tofu: arquivo verificado pelo KnownHostsIndex; chave divergente ou revogada
+    aborta antes das credenciais (HostKeyError); desconhecida segue accept_unknown_hostkey
+    e, com tofu, é gravada no fim da execução. known_hosts_sweep: varre os nomes hasheados
+    sem linha da chave (mismatch ou unknown); sem ela ficam "unverified", fora do TOFU.
+    claim: KEY_CLAIMS.claim (dedup "key"); se outro host já mostrou a mesma chave nesta
+    porta, para após o KEX com SameServerKey.
+    sock/t0: socket já conectado e com o banner lido (motor asyncio/pré-filtro) e
+    instante do início do connect.
+    addrs: endereços já resolvidos (DnsResolver); sem eles o host é resolvido aqui.
+    deadline: HostDeadline com os prazos e as durações de cada fase (padrão: PHASE_BUDGETS).
+    """
+    banner = fingerprint = hostkey_status = auth_method = auth_key = allowed_methods = ""
+    cmd_out = cmd_err = ""
+    ok = False
+    latency_ms = None
+
+    t0 = t0 or time.perf_counter()
+    dl = deadline or HostDeadline(started=t0)
+    # TCP + identificação do servidor
+    if sock is None:
+        raw, prebuf, _ = open_ident(host, port, dl, addrs)
+        sock = _ReplaySocket(raw, prebuf)
+    else:
+        dl.attach(sock)
+    tr = paramiko.Transport(sock)
+    apply_algo_profile(tr, algo_profile)
+    dl.attach(tr)
+    timeout = dl.enter("kex")
+    tr.banner_timeout = tr.handshake_timeout = timeout
+    try:
+        # start_client(timeout=) apenas retorna ao estourar; com event o prazo é verificável
+        kex_done = threading.Event()
+        dl.attach(kex_done)   # prazo/Parar acordam a espera (close() do Transport não a sinaliza)
+        tr.start_client(event=kex_done)
+        if not kex_done.wait(timeout):
+            raise socket.timeout(timeout_error("kex"))
+        if not tr.is_active():
+            raise tr.get_exception() or SSHException("Negotiation failed.")
+    except Exception:
+        tr.close()
+        raise
+
+    # banner/fingerprint
+    try:
+        b = tr.get_banner()
+        banner = b if isinstance(b, str) else (b.decode(errors="ignore") if b else "")
+    except Exception:
+        banner = ""
+    banner = banner or (tr.remote_version or "")
+    try:
+        key = tr.get_remote_server_key()
+        fingerprint = HOST_KEYS.intern(key)
+    except Exception:
+        key, fingerprint = None, ""
+
+    if known_hosts and key is not None:
+        try: peer_ip = sock.getpeername()[0]
+        except Exception: peer_ip = ""
+        kh = known_hosts_index(known_hosts)
+        names = known_hosts_names(host, port, peer_ip)
+        blob = key.get_base64()
+        hostkey_status = kh.check(names, key.get_name(), blob, known_hosts_sweep)
+        if hostkey_status in ("mismatch", "revoked"):
+            tr.close()
+            raise HostKeyError(f"Host key {'revogada' if hostkey_status == 'revoked' else 'diferente da do known_hosts'}",
+                               hostkey_status)
+        if hostkey_status in ("unknown", "unverified"):
+            if not accept_unknown_hostkey:
+                tr.close()
+                raise HostKeyError("Host key desconhecida (ausente do known_hosts)", hostkey_status)
+            # unverified pode ser chave trocada de um host hasheado: não entra no arquivo
+            if tofu and hostkey_status == "unknown": kh.remember(names[0], key.get_name(), blob)
+    # sem known_hosts (política simples): se não aceita desconhecida e não há fingerprint, aborta
+    elif not accept_unknown_hostkey and not fingerprint:
+        tr.close()
+        raise SSHException("Host key desconhecida (AutoAddPolicy desativado)")
+    if claim and fingerprint:
+        leader = claim(fingerprint, port, host)
+        if leader:
+            tr.close()
+            raise SameServerKey(leader, hostkey_status)
+
+    try:
+        allowed = None
+        if probe_methods or methods_only:
+            tr.auth_timeout = dl.enter("auth")
+            allowed = probe_auth_methods(tr, username or PROBE_USERNAME)
+            allowed_methods = "none" if allowed is None else ",".join(allowed)
+            if allowed is None or methods_only:
+                latency_ms = int((time.perf_counter() - t0) * 1000)
+                auth_method = "none" if allowed is None else ""
+                ok = True
+                username = "" if methods_only else username
+        if username and not ok:
+            tr.auth_timeout = dl.enter("auth")
+            keys = [(pkey_obj, sha256_fingerprint(pkey_obj))] if pkey_obj else []
+            keys += [(k, f"agent:{sha256_fingerprint(k)} {k.comment}".rstrip()) for k in agent_identities]
+            auth_method, auth_key = _auth_chain(tr, username, password, keys, kbi_enable, allowed)
+            latency_ms = int((time.perf_counter() - t0) * 1000)
+            ok = True
+    except Exception:
+        tr.close()
+        raise
+
+    # comando opcional
+    if ok and verify_command and not methods_only:
+        timeout = dl.enter("command")
+        chan = tr.open_session(timeout=timeout)
+        chan.settimeout(timeout)
+        chan.exec_command(verify_command)
+        try:
+            cmd_out = chan.makefile("r", -1).read().decode(errors="ignore").strip()
+            cmd_err = chan.makefile_stderr("r", -1).read().decode(errors="ignore").strip()
+        finally:
+            chan.close()
+
+    dl.complete()
+    tr.close()
+    return ok, latency_ms, banner, fingerprint, hostkey_status, auth_method, auth_key, allowed_methods, cmd_out, cmd_err
+
+# ---------- Opções / resultado ----------
+@dataclass
+class ScanOptions:
+    """Parâmetros de autenticação comuns a todos os hosts de uma execução."""
+    username: str = ""
+    password: str = ""
+    pkey_path: str | None = None
+    passphrase: str | None = None
+    accept_unknown_hostkey: bool = True
+    verify_command: str = ""
+    kbi_enable: bool = True
+    use_agent: bool = False
+    mode: str = "full"              # ver SCAN_MODES
+    probe_methods: bool = False
+    algo_profile: str = "default"   # ver ALGO_PROFILES
+    known_hosts: str | None = None
+    tofu: bool = False
+    known_hosts_sweep: bool = False   # ver KnownHostsIndex.check
+    dedup: str = "off"              # ver DEDUP_MODES
+    phase_budgets: dict = field(default_factory=lambda: dict(PHASE_BUDGETS))
+    host_timeout: float = HOST_TIMEOUT
+
+    def deadline(self, started=None):
+        return HostDeadline(self.phase_budgets, self.host_timeout, started)
+
+RESULT_COLUMNS = ("host","ip","port","ok","latency_ms","time_ms","auth_method","auth_key","allowed_methods","banner","fingerprint","key_hosts","hostkey_status","cmd_stdout","cmd_stderr","error","timeout_phase","inherited_from") + PHASE_COLUMNS
+
+def new_result(host, port, ip=""):
+    return {
+        "host": host, "ip": ip, "port": port,
+        "ok": False, "latency_ms": "", "time_ms": 0,
+        "banner": "", "fingerprint": "", "key_hosts": "", "hostkey_status": "", "auth_method": "", "auth_key": "", "allowed_methods": "",
+        "cmd_stdout": "", "cmd_stderr": "", "error": "", "timeout_phase": "", "inherited_from": "",
+        **dict.fromkeys(PHASE_COLUMNS, "")
+    }
+
+def result_to_row(r: dict):
+    """Tupla na ordem de RESULT_COLUMNS (Treeview e CSV)."""
+    return (
+        r.get("host",""), r.get("ip",""), r.get("port",""),
+        "✔" if r.get("ok") else "✖",
+        r.get("latency_ms",""), r.get("time_ms",""),
+        r.get("auth_method",""), r.get("auth_key",""), r.get("allowed_methods",""), r.get("banner",""), r.get("fingerprint",""), r.get("key_hosts",""), r.get("hostkey_status",""),
+        (r.get("cmd_stdout","") or "")[:300],
+        (r.get("cmd_stderr","") or "")[:200],
+        r.get("error",""), r.get("timeout_phase",""), r.get("inherited_from",""),
+        *(r.get(c,"") for c in PHASE_COLUMNS),
+    )
+
+class StringTable:
+    """Textos distintos de uma coluna, guardados uma vez; cada linha guarda só o código."""
+    __slots__ = ("strings", "codes", "keys")
+    def __init__(self):
+        self.strings, self.codes, self.keys = [""], {"": 0}, [""]
+
+    def code(self, s):
+        c = self.codes.get(s)
+        if c is None:
+            c = self.codes[s] = len(self.strings)
+            self.strings.append(s); self.keys.append(str(s).lower())   # chave de ordenação
+        return c
+
+def _store_int(v):
+    """Inteiro da coluna; -1 para vazio ("" nos resultados)."""
+    if type(v) is int: return v
+    if v == "" or v is None: return -1
+    try: return int(v)
+    except (TypeError, ValueError): return -1
+
+SORT_LAST = 1 << 62   # chave de inteiro vazio: depois de qualquer valor
+
+def _ip_sort_key(ip):
+    """IPv4 antes de IPv6, em ordem numérica; vazio ou inválido por último."""
+    for fam, tag in ((socket.AF_INET, b"\x04"), (socket.AF_INET6, b"\x06")):
+        try: return tag + socket.inet_pton(fam, ip)
+        except (OSError, ValueError): pass
+    return b"\xff" + str(ip).encode()
+
+class Descending:
+    """Inverte a comparação de uma chave (coluna decrescente dentro de uma chave composta)."""
+    __slots__ = ("k",)
+    def __init__(self, k): self.k = k
+    def __lt__(self, o): return o.k < self.k
+    def __eq__(self, o): return self.k == o.k
+
+def merge_sorted(seq, rows, key):
+    """
+    Insere `rows` (já em ordem de key) no array ordenado `seq` com uma busca binária por linha
+    e uma única cópia do array; devolve o novo array.
+    """
+    out, prev = array("I"), 0
+    for row in rows:
+        k, lo, hi = key(row), prev, len(seq)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if k < key(seq[mid]): hi = mid
+            else: lo = mid + 1
+        out += seq[prev:lo]; out.append(row); prev = lo
+    out += seq[prev:]
+    return out
+
+def sorted_index(seq, row, key):
+    """Posição de `row` no array ordenado `seq` (a chave inclui a linha, então é única)."""
+    k, lo, hi = key(row), 0, len(seq)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(seq[mid]) < k: lo = mid + 1
+        else: hi = mid
+    return lo
+
+class ResultRow:
+    """Vista de uma linha do ResultStore: campos por atributo (como em result_to_row), sem cópia."""
+    __slots__ = ("store", "row")
+    def __init__(self, store, row):
+        self.store, self.row = store, row
+
+    def __getattr__(self, name):
+        if name not in self.store.pos: raise AttributeError(name)
+        return self.store.get(self.row, name)
+
+    def values(self):
+        return self.store.values(self.row)
+
+class ResultStore:
+    """
+    Resultados da GUI por coluna, tipados: inteiros em array("i") (-1 = vazio), "ok" em bits,
+    textos de poucos valores distintos (banner, método, erro…) como códigos de StringTable e,
+    em listas, host/IP e os textos quase únicos por servidor (fingerprint, saída do comando,
+    líder herdado), que a tabela só duplicaria. A linha é o índice; store[linha] é uma ResultRow.
+    """
+    INTS = ("port", "latency_ms", "time_ms", "key_hosts", *PHASE_COLUMNS)
+    TABLES = ("auth_method", "auth_key", "allowed_methods", "banner", "hostkey_status", "error", "timeout_phase")
+
+    def __init__(self):
+        self.n = 0
+        self.ok = bytearray()   # bit (linha & 7) do byte linha >> 3
+        self.tables = {c: StringTable() for c in self.TABLES}
+        self.cols = [None if c == "ok" else array("i") if c in self.INTS else array("I") if c in self.tables else []
+                     for c in RESULT_COLUMNS]
+        self.pos = {c: i for i, c in enumerate(RESULT_COLUMNS)}
+        # por coluna: valor de result_to_row -> valor guardado, e linha -> valor exibido
+        self._enc, self._dec = [], []
+        for c, col in zip(RESULT_COLUMNS, self.cols):
+            if col is None:
+                self._enc.append(None); self._dec.append(self._ok_text)
+            elif c in self.tables:
+                t = self.tables[c]
+                self._enc.append(t.code); self._dec.append(lambda row, col=col, s=t.strings: s[col[row]])
+            elif c in self.INTS:
+                self._enc.append(_store_int); self._dec.append(lambda row, col=col: "" if col[row] < 0 else col[row])
+            else:
+                self._enc.append(str); self._dec.append(col.__getitem__)
+        self._keys = {}   # coluna -> chaves de ordenação já montadas (linha -> chave)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, row):
+        return ResultRow(self, row)
+
+    def _ok_text(self, row):
+        return "✔" if self.ok[row >> 3] >> (row & 7) & 1 else "✖"
+
+    def _set_ok(self, row, ok):
+        if ok: self.ok[row >> 3] |= 1 << (row & 7)
+        else: self.ok[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def append(self, r: dict):
+        row = self.n
+        if not row & 7: self.ok.append(0)
+        self._set_ok(row, r.get("ok"))
+        for col, enc, v in zip(self.cols, self._enc, result_to_row(r)):
+            if enc: col.append(enc(v))
+        self.n += 1
+        return row
+
+    def update(self, row, r: dict):
+        self._set_ok(row, r.get("ok"))
+        for col, enc, v in zip(self.cols, self._enc, result_to_row(r)):
+            if enc: col[row] = enc(v)
+        self._rekey(row)
+
+    def _key_fn(self, name):
+        col = self.cols[self.pos[name]]
+        if col is None: return lambda row: self.ok[row >> 3] >> (row & 7) & 1
+        if name in self.INTS: return lambda row: SORT_LAST if col[row] < 0 else col[row]
+        if name in self.tables: return lambda row, k=self.tables[name].keys: k[col[row]]
+        return lambda row: _ip_sort_key(col[row])
+
+    def sort_keys(self, name):
+        """
+        Chaves tipadas para ordenar pela coluna (linha -> chave), montadas uma vez por linha e
+        estendidas conforme as linhas chegam: números como número (vazio por último), "ok"
+        como bit, textos de tabela pela forma minúscula, IP pelos bytes do endereço; o host
+        e os demais textos em lista são o próprio texto.
+        """
+        col = self.cols[self.pos[name]]
+        if type(col) is list and name != "ip": return col
+        keys = self._keys.get(name)
+        if keys is None:
+            keys = self._keys[name] = (array("q") if name in self.INTS else bytearray() if name == "ok" else [],
+                                       self._key_fn(name))
+        keys, fn = keys
+        if len(keys) < self.n: keys.extend(fn(row) for row in range(len(keys), self.n))
+        return keys
+
+    def _rekey(self, row):
+        for keys, fn in self._keys.values():
+            if row < len(keys): keys[row] = fn(row)
+
+    def get(self, row, name):
+        return self._dec[self.pos[name]](row)
+
+    def values(self, row):
+        return tuple(f(row) for f in self._dec)
+
+    def recount_keys(self, counts):
+        """key_hosts pelo total atual de cada fingerprint; devolve as linhas alteradas."""
+        kh, changed = self.cols[self.pos["key_hosts"]], []
+        for row, fp in enumerate(self.cols[self.pos["fingerprint"]]):
+            k = counts.get(fp, 0) if fp else 0
+            if k and k != kh[row]:
+                kh[row] = k; changed.append(row); self._rekey(row)
+        return changed
+
+# ---------- Alvos: sintaxe de expansão (CIDR, faixas, listas de portas, IPv6) ----------
+def parse_ports(spec, default_port):
+    """"22,2222,8000-8010" -> [22, 2222, 8000, …]; vazio ou inválido -> [default_port]."""
+    ports = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        a, _, b = part.partition("-")
+        try: lo = int(a); hi = int(b) if b else lo
+        except ValueError: continue
+        ports.extend(range(max(1, lo), min(65535, hi) + 1))
+    return list(dict.fromkeys(ports)) or [default_port]
+
+def split_target(s, default_port):
+    """"host", "host:portas", "[IPv6]:portas" ou IPv6 sem colchetes -> (host, [portas])."""
+    if s.startswith("["):
+        h, _, rest = s[1:].partition("]")
+        spec = rest[1:] if rest.startswith(":") else ""
+    elif s.count(":") == 1:
+        h, spec = s.split(":")
+    else:
+        h, spec = s, ""
+    return h.strip(), parse_ports(spec, default_port)
+
+def _ipv4_range(h):
+    """"a.b.c.d-e" ou "a.b.c.d-a.b.c.e" -> (início, fim) como int, ou None (nome com '-')."""
+    lo, sep, hi = h.partition("-")
+    if not sep or not lo[:1].isdigit(): return None
+    try:
+        start = ipaddress.IPv4Address(lo)
+        end = ipaddress.IPv4Address(lo.rsplit(".", 1)[0] + "." + hi if hi.isdigit() else hi)
+    except ValueError:
+        return None
+    return int(start), int(end)
+
+def _network(h):
+    if "/" not in h: return None
+    try: return ipaddress.ip_network(h, strict=False)
+    except ValueError: return None
+
+def _ipv4_strs(start, end):
+    pack, ntoa = struct.Struct("!I").pack, socket.inet_ntoa   # bem mais rápido que IPv4Address
+    return (ntoa(pack(i)) for i in range(start, end + 1))
+
+def expand_host(h):
+    """Host, bloco CIDR (v4/v6) ou faixa IPv4 -> endereços sob demanda (nada é materializado)."""
+    net = _network(h)
+    if net is not None:
+        if net.num_addresses <= 2: return map(str, net)
+        if net.version == 4:   # sem rede e broadcast, como hosts()
+            return _ipv4_strs(int(net.network_address) + 1, int(net.broadcast_address) - 1)
+        return map(str, net.hosts())
+    r = _ipv4_range(h)
+    if r is not None: return _ipv4_strs(*r)
+    return iter((h,))
+
+def host_count(h):
+    """Quantos endereços expand_host(h) produz, sem iterar."""
+    net = _network(h)
+    if net is not None:
+        n = net.num_addresses
+        return n if n <= 2 else n - (2 if net.version == 4 else 1)
+    r = _ipv4_range(h)
+    return max(0, r[1] - r[0] + 1) if r is not None else 1
+
+class SeenTargets:
+    """
+    (host, porta) já emitidos. IPv4 em bitmaps por porta, em blocos /16 de 8 KB criados
+    sob demanda (um /8 inteiro numa porta cabe em 2 MB); nomes e IPv6 num set.
+    """
+    def __init__(self):
+        self.blocks = {}   # (porta, ip >> 16) -> bytearray(8192)
+        self.other = set()
+
+    def add(self, host, port):
+        """True se (host, porta) ainda não foi visto (e o marca)."""
+        if host[:1].isdigit():
+            try: ip = int.from_bytes(socket.inet_aton(host), "big")
+            except OSError: ip = None
+            if ip is not None:
+                block = self.blocks.get((port, ip >> 16))
+                if block is None: block = self.blocks[(port, ip >> 16)] = bytearray(8192)
+                i, bit = (ip & 0xFFFF) >> 3, 1 << (ip & 7)
+                if block[i] & bit: return False
+                block[i] |= bit
+                return True
+        key = (host.lower(), port)
+        if key in self.other: return False
+        self.other.add(key)
+        return True
+
+def _target_lines(lines):
+    for line in lines:
+        s = line.strip()
+        if s and not s.startswith("#"): yield s
+
+def parse_targets(lines, default_port, seen=None):
+    """
+    Linhas -> (host, porta) sob demanda; ignora vazias e '#'. Cada linha aceita host,
+    host:porta, host:22,2222 (lista/faixa de portas), [IPv6]:porta, CIDR (10.0.0.0/16,
+    2001:db8::/120) e faixa IPv4 (10.1.2.10-200); repetidos são descartados (seen).
+    """
+    seen = SeenTargets() if seen is None else seen
+    for s in _target_lines(lines):
+        h, ports = split_target(s, default_port)
+        for host in expand_host(h):
+            for port in ports:
+                if seen.add(host, port): yield host, port
+
+def count_targets(lines, default_port):
+    """Total de alvos das linhas (antes de descartar repetidos), sem expandir."""
+    return sum(host_count(h) * len(ports) for h, ports in
+               (split_target(s, default_port) for s in _target_lines(lines)))
+
+def iter_target_file(path, default_port):
+    """Alvos lidos do arquivo linha a linha, à medida que o motor os consome."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        yield from parse_targets(f, default_port)
+
+def count_target_file(path, default_port=DEFAULT_PORT):
+    """Total de alvos do arquivo (antes de descartar repetidos), lido em fluxo."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return count_targets(f, default_port)
+
+class TargetFeed:
+    """
+    Alvos lidos por uma thread própria para uma fila limitada, para quem não pode bloquear
+    num next(): o event loop do asyncio e o selector do pré-filtro. A fonte pode esperar
+    à vontade (fila dos shards, stdin, DNS do dedup) sem parar as conexões em voo.
+    """
+    END = object()
+
+    def __init__(self, targets, ahead=FEED_AHEAD):
+        self.q = queue.Queue(max(1, ahead))   # 0 seria fila sem limite
+        self.closed = False
+        self.error = None
+        threading.Thread(target=self._fill, args=(targets,), daemon=True).start()
+
+    def _fill(self, targets):
+        try:
+            for t in targets:
+                if not self._put(t): return
+        except Exception as e:
+            self.error = e   # relançado no consumidor, como faria o next() direto
+        self._put(self.END)
+
+    def _put(self, item):
+        while not self.closed:
+            try:
+                self.q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get_nowait(self):
+        """Próximo alvo; queue.Empty se a fonte ainda não entregou nenhum, None no fim."""
+        t = self.q.get_nowait()
+        if t is not self.END: return t
+        if self.error: raise self.error
+        return None
+
+    def close(self):
+        """Fim do consumo (Parar/erro): a thread larga a fonte na próxima entrega."""
+        self.closed = True
+
+# ---------- Worker ----------
+def test_ssh_host(host, port, opts: ScanOptions, sock=None, ip=None, started=None, deadline=None):
+    """
+    Testa um host e devolve o dict de resultado (ver new_result).
+    sock/ip/started/deadline: fornecidos pelo motor asyncio/pré-filtro, que já resolveu,
+    conectou e leu o banner dentro dos prazos do host (durações em deadline.phases).
+    """
+    started = started or time.perf_counter()
+    dl = deadline or opts.deadline(started)
+    result = new_result(host, port, ip or "")
+
+    try:
+        addrs = None
+        if ip is None:
+            addrs = RESOLVER.resolve(host, dl.enter("dns"), _WATCHDOG.cancelled)
+            result["ip"] = addrs[0][1][0]
+        if opts.mode == "banner" and sock is None:
+            sock, _, ident = open_ident(host, port, dl, addrs)
+            result["ip"] = sock.getpeername()[0]
+            dl.complete()
+            return finish_banner(result, ident, started, dl.phases)
+        pkey_obj = load_pkey(opts.pkey_path, opts.passphrase) if opts.pkey_path else None
+        ok, lat, ban, fp, hk, method, key, allowed, out, err = try_auth_with_fallback(
+            host, port, (opts.username or "").strip(), (opts.password or ""),
+            pkey_obj, opts.accept_unknown_hostkey, (opts.verify_command or ""), opts.kbi_enable,
+            sock=sock, t0=started, deadline=dl, addrs=addrs,
+            agent_identities=agent_keys() if opts.use_agent else (),
+            probe_methods=opts.probe_methods, methods_only=opts.mode == "methods",
+            algo_profile=opts.algo_profile, known_hosts=opts.known_hosts, tofu=opts.tofu,
+            known_hosts_sweep=opts.known_hosts_sweep,
+            claim=KEY_CLAIMS.claim if opts.dedup == "key" else None
+        )
+        result.update({
+            "ok": ok, "latency_ms": lat, "banner": ban,
+            "fingerprint": fp, "hostkey_status": hk, "auth_method": method, "auth_key": key, "allowed_methods": allowed,
+            "cmd_stdout": out, "cmd_stderr": err
+        })
+    except Exception as e:
+        phase = dl.timed_out_phase(e)
+        if dl.cancelled or isinstance(e, ScanCancelled):
+            result["error"] = ERR_CANCELLED
+        elif phase:
+            result["error"], result["timeout_phase"] = timeout_error(phase), phase
+        elif isinstance(e, SameServerKey):
+            result["inherited_from"], result["hostkey_status"] = e.leader, e.hostkey_status
+        elif isinstance(e, HostKeyError):
+            result["error"], result["hostkey_status"] = str(e), e.hostkey_status
+        elif isinstance(e, AuthenticationException):
+            dl.complete()   # recusa também conclui a fase: o tempo de PAM interessa
+            result["error"] = f"Auth falhou: {e}"
+            result["allowed_methods"] = ",".join(getattr(e, "allowed_types", None) or ())
+        else:
+            result["error"] = str(e)
+    finally:
+        dl.finish()
+        if sock is not None:
+            try: sock.close()
+            except Exception: pass
+        result.update({f"{p}_ms": ms for p, ms in dl.phases.items()})
+        result["time_ms"] = int((time.perf_counter() - started) * 1000)
+    return result
+
+# ---------- Estatísticas por fase ----------
+class PhaseStats:
+    """Durações (ms) das fases concluídas em toda a execução; percentis no fim."""
+    def __init__(self):
+        self.samples = {p: array("I") for p in PHASES}
+        self.lock = threading.Lock()
+
+    def add(self, r: dict):
+        if r.get("partial") or r.get("inherited_from"): return   # herdado: tempos são do líder
+        with self.lock:
+            for p in PHASES:
+                v = r.get(f"{p}_ms")
+                if isinstance(v, int) and v >= 0: self.samples[p].append(v)
+
+    def percentiles(self, qs=(50, 90, 99)):
+        """{fase: {50: ms, 90: ms, 99: ms, "max": ms, "n": amostras}} (nearest-rank)."""
+        out = {}
+        with self.lock:
+            for p, a in self.samples.items():
+                if not a: continue
+                s = sorted(a); n = len(s)
+                row = {q: s[max(0, math.ceil(q / 100 * n) - 1)] for q in qs}
+                row.update({"max": s[-1], "n": n})
+                out[p] = row
+        return out
+
+    def summary(self):
+        """Uma linha para a barra de status: p50/p90 de cada fase."""
+        pct = self.percentiles((50, 90))
+        return "  •  ".join(f"{p} {v[50]}/{v[90]}" for p, v in pct.items())
+
+    def table(self):
+        lines = [f"{'fase':<9}{'n':>8}{'p50':>8}{'p90':>8}{'p99':>8}{'máx':>8}  (ms)"]
+        for p, v in self.percentiles().items():
+            lines.append(f"{p:<9}{v['n']:>8}{v[50]:>8}{v[90]:>8}{v[99]:>8}{v['max']:>8}")
+        return "\n".join(lines)
+
+# ---------- Progresso / ETA ----------
+def fmt_duration(s):
+    s = int(s)
+    if s >= 3600: return f"{s // 3600}h{s % 3600 // 60:02d}m"
+    return f"{s // 60}m{s % 60:02d}s" if s >= 60 else f"{s}s"
+
+class ScanProgress:
+    """Concluídos/total e ETA pelo ritmo médio com o motor ativo (tempo pausado não conta)."""
+    def __init__(self, total=None):
+        self.total = total    # None até a contagem dos alvos terminar
+        self.done = 0
+        self.started = time.perf_counter()
+        self.paused_s = 0.0
+        self.paused_at = None
+
+    def add(self, r: dict):
+        if not r.get("partial"): self.done += 1
+
+    def pause(self):
+        if self.paused_at is None: self.paused_at = time.perf_counter()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.paused_s += time.perf_counter() - self.paused_at
+            self.paused_at = None
+
+    def eta(self):
+        """Segundos restantes no ritmo atual (a partir de agora, ou da retomada se pausado)."""
+        if not self.total or not self.done: return None
+        active = (self.paused_at or time.perf_counter()) - self.started - self.paused_s
+        return max(0, self.total - self.done) * active / self.done
+
+    def text(self):
+        eta = self.eta()
+        done = f"{self.done}/{self.total}" if self.total else str(self.done)
+        return done + (f" • ETA {fmt_duration(eta)}" if eta is not None else "")
+
+# ---------- Concorrência adaptativa (AIMD + latência estilo Vegas) ----------
+class AdaptiveConcurrency:
+    """
+    Janela de testes em voo entre min_w e max_w, ajustada a cada resultado:
+    - slow start (+1 por conclusão) até o primeiro sinal de congestionamento, depois +1 por janela;
+    - corte ×ADAPT_DECREASE quando a taxa de timeouts (EWMA) passa de ADAPT_TIMEOUT_RATE ou o
+      connect, medido contra o menor da mesma sub-rede (/24, /64) e suavizado, passa de
+      ADAPT_LATENCY_FACTOR (fila na rede, à la Vegas); hosts distantes não contam como fila;
+    - no máximo um corte por ADAPT_EPOCH_S, para que uma rajada não derrube a janela ao mínimo.
+    """
+    def __init__(self, min_w=ADAPT_MIN_DEFAULT, max_w=ADAPT_MAX_DEFAULT):
+        self.min_w = max(1, int(min_w))
+        self.max_w = max(self.min_w, int(max_w))
+        self.window = float(self.min_w)
+        self.ssthresh = float(self.max_w)
+        self.in_flight = 0
+        self.base_ms = {}       # sub-rede -> menor connect visto
+        self.inflation = 1.0    # connect / base da sub-rede (EWMA)
+        self.timeout_rate = 0.0
+        self.last_cut = 0.0
+        self.cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return max(self.min_w, min(self.max_w, int(self.window)))
+
+    def try_acquire(self):
+        with self.cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, stop_flag: threading.Event | None = None):
+        with self.cond:
+            while self.in_flight >= self.limit:
+                if stop_flag and stop_flag.is_set(): return False
+                self.cond.wait(0.2)
+            self.in_flight += 1
+            return True
+
+    def cancel_waiters(self):
+        """Acorda quem espera em acquire() (que confere o stop_flag)."""
+        with self.cond:
+            self.cond.notify_all()
+
+    def cancel(self):
+        """Devolve uma vaga obtida sem teste (ex.: fim da lista), sem amostra."""
+        with self.cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.cond.notify_all()
+
+    def release(self, r: dict):
+        timed_out = r.get("timeout_phase") in CONGESTION_PHASES
+        connect_ms = r.get("connect_ms")
+        with self.cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.timeout_rate += ADAPT_EWMA * ((1.0 if timed_out else 0.0) - self.timeout_rate)
+            congested = self.timeout_rate > ADAPT_TIMEOUT_RATE
+            if isinstance(connect_ms, (int, float)) and not timed_out:
+                congested = self._inflated(_subnet(r.get("ip") or ""), connect_ms) or congested
+            now = time.perf_counter()
+            if congested:
+                if now - self.last_cut >= ADAPT_EPOCH_S:
+                    self.window = max(float(self.min_w), self.window * ADAPT_DECREASE)
+                    self.ssthresh = self.window
+                    self.last_cut = now
+            elif self.window < self.ssthresh:
+                self.window = min(float(self.max_w), self.window + 1.0)
+            else:
+                self.window = min(float(self.max_w), self.window + 1.0 / self.window)
+            self.cond.notify_all()
+
+    def _inflated(self, key, connect_ms):
+        """Amostra contra a base da própria sub-rede; a primeira de cada sub-rede só vira base."""
+        base = self.base_ms.get(key)
+        if base is None:
+            if len(self.base_ms) >= ADAPT_SUBNETS_MAX:
+                del self.base_ms[next(iter(self.base_ms))]
+            self.base_ms[key] = connect_ms
+            return False
+        base = self.base_ms[key] = min(base, connect_ms)
+        ratio = max(connect_ms, ADAPT_LATENCY_FLOOR_MS) / max(base, ADAPT_LATENCY_FLOOR_MS)
+        self.inflation += ADAPT_EWMA * (ratio - self.inflation)
+        return self.inflation > ADAPT_LATENCY_FACTOR
+
+def _subnet(ip):
+    """/24 do IPv4 ou /64 do IPv6: hosts que costumam dividir o caminho na rede."""
+    if ":" not in ip: return ip.rpartition(".")[0]
+    try: return socket.inet_pton(socket.AF_INET6, ip.split("%", 1)[0])[:8]
+    except (OSError, ValueError): return ip
+
+class FixedWindow(AdaptiveConcurrency):
+    """Mesma interface com janela fixa: limita o que foi submetido e ainda não terminou."""
+    def __init__(self, limit):
+        super().__init__(limit, limit)
+
+    def take(self):
+        """Ocupa uma vaga mesmo acima do limite (o trabalho já existe, ex.: socket do pré-filtro)."""
+        with self.cond: self.in_flight += 1
+
+    def release(self, r: dict):
+        self.cancel()
+
+class PauseGate:
+    """Pausa entre alvos: quem puxa o próximo alvo espera aqui; os testes em voo seguem."""
+    def __init__(self):
+        self.running = threading.Event()
+        self.running.set()
+
+    @property
+    def paused(self):
+        return not self.running.is_set()
+
+    def pause(self): self.running.clear()
+    def resume(self): self.running.set()
+
+    def wait(self, stop_flag: threading.Event):
+        """Bloqueia enquanto pausado; False se o Parar chegou antes da retomada."""
+        while not self.running.wait(0.1):
+            if stop_flag.is_set(): return False
+        return not stop_flag.is_set()
+
+# ---------- Identificação SSH (banner) ----------
+class _ReplaySocket:
+    """
+    Socket para o paramiko.Transport que devolve primeiro os bytes já lidos
+    pelo event loop (banner) e depois delega ao socket real.
+    """
+    def __init__(self, sock, prebuf: bytes):
+        self._sock = sock
+        self._buf = prebuf
+
+    def recv(self, n):
+        if self._buf:
+            data, self._buf = self._buf[:n], self._buf[n:]
+            return data
+        return self._sock.recv(n)
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+def find_ident(buf: bytes):
+    """Linha de identificação "SSH-..." em buf (RFC 4253 permite linhas antes dela) ou None."""
+    start = 0
+    while True:
+        nl = buf.find(b"\n", start)
+        if nl < 0: return None
+        line = buf[start:nl].rstrip(b"\r")
+        if line.startswith(b"SSH-"):
+            return line.decode(errors="ignore")
+        start = nl + 1
+
+def read_ident(sock):
+    """Versão bloqueante de read_ident_async (o timeout do socket vale por recv)."""
+    buf = b""
+    while True:
+        chunk = sock.recv(1024)
+        if not chunk:
+            raise SSHException("Conexão fechada antes do banner SSH")
+        buf += chunk
+        ident = find_ident(buf)
+        if ident: return buf, ident
+        if len(buf) > BANNER_MAX_BYTES:
+            raise SSHException("Banner SSH não encontrado")
+
+async def read_ident_async(loop, sock):
+    """Lê do socket (não bloqueante) até a linha SSH-; devolve (bytes_lidos, ident)."""
+    buf = b""
+    while True:
+        chunk = await loop.sock_recv(sock, 1024)
+        if not chunk:
+            raise SSHException("Conexão fechada antes do banner SSH")
+        buf += chunk
+        ident = find_ident(buf)
+        if ident: return buf, ident
+        if len(buf) > BANNER_MAX_BYTES:
+            raise SSHException("Banner SSH não encontrado")
+
+# ---------- Pré-filtro: connect + banner não bloqueantes (selectors/epoll) ----------
+def raise_nofile_limit():
+    """Sobe o limite de descritores abertos (soft -> hard) para milhares de sockets simultâneos."""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY: hard = 1 << 16
+        if soft < hard: resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except Exception:
+        pass
+
+def banner_result(host, port, ip, ident):
+    """Resultado parcial (só banner), emitido antes do KEX/auth; o resultado final o substitui."""
+    r = new_result(host, port, ip)
+    r["banner"] = ident
+    r["partial"] = True
+    return r
+
+def finish_banner(r, ident, started, phases):
+    """Resultado final do modo "banner": ok = identificação lida; colunas de auth vazias."""
+    r.update({f"{p}_ms": ms for p, ms in phases.items()})
+    r["time_ms"] = r["latency_ms"] = int((time.perf_counter() - started) * 1000)
+    r["banner"], r["ok"] = ident, True
+    return r
+
+class _Probe:
+    __slots__ = ("host", "port", "ip", "sock", "started", "deadline", "buf", "stage", "addrs", "phases", "t_phase")
+
+    def __init__(self, host, port, started, deadline):
+        self.host, self.port, self.ip, self.sock = host, port, "", None
+        self.started = started
+        self.deadline = deadline
+        self.buf = b""
+        self.stage = "dns"
+        self.addrs = None
+        self.phases = {}
+        self.t_phase = started
+
+    def mark(self, phase, now):
+        self.phases[phase] = int((now - self.t_phase) * 1000)
+        self.t_phase = now
+
+class BannerPrefilter:
+    """
+    Estágio 1 do pipeline: connects não bloqueantes de milhares de hosts num único
+    selector (epoll/kqueue). Quem responde "SSH-" segue para
+    on_ssh(host, port, ip, sock, prebuf, ident, started, phases); os demais viram
+    resultado final em on_fail(result) sem ocupar um worker de KEX/auth.
+    A resolução vai para o RESOLVER (pool de DNS); o loop só consome as respostas.
+    gate: AdaptiveConcurrency opcional; cada alvo ocupa uma vaga até o resultado final.
+    downstream: janela do estágio seguinte (FixedWindow); cheia, nenhum alvo novo é iniciado.
+    pause: PauseGate; pausado, nenhum alvo novo é iniciado e os em voo terminam.
+    budgets/host_timeout: prazos de DNS, connect e banner (ver PHASE_BUDGETS).
+    lookahead: alvos lidos à frente do que está em voo (DNS antecipado).
+    """
+    def __init__(self, in_flight=PREFILTER_IN_FLIGHT, stop_flag: threading.Event | None = None,
+                 gate: AdaptiveConcurrency | None = None, budgets=None, host_timeout=HOST_TIMEOUT,
+                 downstream: AdaptiveConcurrency | None = None, pause: PauseGate | None = None,
+                 lookahead=DNS_LOOKAHEAD):
+        self.lookahead = lookahead
+        self.budgets = budgets or PHASE_BUDGETS
+        self.host_timeout = host_timeout
+        if sys.platform == "win32":   # SelectSelector: FD_SETSIZE = 512
+            in_flight = min(in_flight, 500)
+        self.in_flight = max(1, int(in_flight))
+        self.stop_flag = stop_flag or threading.Event()
+        self.gate = gate
+        self.downstream = downstream
+        self.pause = pause
+        self.dns_wait = set()      # probes aguardando o DNS
+        self.dns_ready = deque()   # (probe, Future) concluídos pelo pool de DNS
+
+    def run(self, targets, on_ssh, on_fail):
+        raise_nofile_limit()
+        self.sel = sel = selectors.DefaultSelector()
+        feed = TargetFeed(RESOLVER.prefetch(targets, self.lookahead), min(FEED_AHEAD, self.lookahead))
+        exhausted = False
+        next_sweep = 0.0
+        try:
+            while True:
+                down = self.downstream
+                starved = False
+                while not exhausted and len(sel.get_map()) + len(self.dns_wait) < self.in_flight \
+                        and not self.stop_flag.is_set() and not (down and down.in_flight >= down.limit) \
+                        and not (self.pause and self.pause.paused):
+                    if self.gate and not self.gate.try_acquire(): break
+                    try:
+                        t = feed.get_nowait()
+                    except queue.Empty:
+                        starved = True   # fonte lenta: tenta de novo na próxima volta
+                    else:
+                        if t is not None:
+                            self._start(*t, on_fail); continue
+                        exhausted = True
+                    if self.gate: self.gate.cancel()
+                    break
+                while self.dns_ready:
+                    probe, fut = self.dns_ready.popleft()
+                    if probe in self.dns_wait:
+                        self.dns_wait.discard(probe)
+                        self._resolved(probe, fut, on_fail)
+                if self.stop_flag.is_set(): break
+                if not sel.get_map():
+                    if exhausted and not self.dns_wait and not self.dns_ready: break
+                    time.sleep(0.01)   # só DNS pendente, ou janela cheia no pool de KEX/auth
+                else:
+                    for key, _ in sel.select(timeout=0.01 if self.dns_wait or starved else 0.1):
+                        self._on_event(key.data, on_ssh, on_fail)
+                now = time.perf_counter()
+                if now >= next_sweep:
+                    next_sweep = now + 0.1
+                    for probe in [p for p in self.dns_wait if p.deadline < now]:
+                        self.dns_wait.discard(probe)
+                        self._fail(probe, timeout_error("dns"), on_fail, "dns")
+                    for key in list(sel.get_map().values()):
+                        if key.data.deadline < now:
+                            phase = key.data.stage
+                            self._fail(key.data, timeout_error(phase), on_fail, phase)
+        finally:   # Parar: os em voo viram "Cancelado" em vez de sumir do resultado
+            feed.close()
+            for probe in [key.data for key in sel.get_map().values()] + list(self.dns_wait):
+                self._fail(probe, ERR_CANCELLED, on_fail)
+            sel.close()
+            self.dns_wait.clear(); self.dns_ready.clear()
+
+    def _fail(self, probe, error, on_fail, timeout_phase=""):
+        if probe.sock is not None:
+            try: self.sel.unregister(probe.sock)
+            except Exception: pass
+            probe.sock.close()
+        r = new_result(probe.host, probe.port, probe.ip)
+        r["error"] = error
+        r["timeout_phase"] = timeout_phase
+        r.update({f"{p}_ms": ms for p, ms in probe.phases.items()})
+        r["time_ms"] = int((time.perf_counter() - probe.started) * 1000)
+        if self.gate: self.gate.release(r)
+        on_fail(r)
+
+    def _start(self, host, port, on_fail):
+        now = time.perf_counter()
+        probe = _Probe(host, port, now, now + min(self.budgets["dns"], self.host_timeout))
+        fut = RESOLVER.resolve_future(host)
+        if fut.done():
+            return self._resolved(probe, fut, on_fail)
+        self.dns_wait.add(probe)
+        fut.add_done_callback(lambda f, probe=probe: self.dns_ready.append((probe, f)))
+
+    def _resolved(self, probe, fut, on_fail):
+        try:
+            probe.addrs = list(fut.result())
+        except Exception as e:
+            return self._fail(probe, str(e), on_fail)
+        now = time.perf_counter()
+        probe.mark("dns", now)
+        probe.stage = "connect"
+        probe.deadline = min(now + self.budgets["connect"], probe.started + self.host_timeout)
+        self._connect(probe, on_fail)
+
+    def _connect(self, probe, on_fail):
+        """connect não bloqueante no próximo endereço resolvido (IPv6/IPv4 na ordem do sistema)."""
+        err = errno.EHOSTUNREACH
+        while probe.addrs:
+            family, sa = probe.addrs.pop(0)
+            probe.ip = sa[0]
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            err = sock.connect_ex(with_port(sa, probe.port))
+            if err in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", -1)):
+                probe.sock = sock
+                self.sel.register(sock, selectors.EVENT_WRITE, probe)
+                return
+            sock.close()
+        probe.mark("connect", time.perf_counter())   # recusa conclui a fase, como em open_ident
+        self._fail(probe, str(OSError(err, os.strerror(err))), on_fail)
+
+    def _on_event(self, probe, on_ssh, on_fail):
+        sock = probe.sock
+        if probe.stage == "connect":
+            err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err and probe.addrs:
+                self.sel.unregister(sock); sock.close(); probe.sock = None
+                return self._connect(probe, on_fail)
+            if err:
+                probe.mark("connect", time.perf_counter())
+                return self._fail(probe, str(OSError(err, os.strerror(err))), on_fail)
+            probe.stage = "banner"
+            now = time.perf_counter()
+            probe.mark("connect", now)
+            probe.deadline = min(now + self.budgets["banner"], probe.started + self.host_timeout)
+            self.sel.modify(sock, selectors.EVENT_READ, probe)
+            return
+        try:
+            chunk = sock.recv(1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            return self._fail(probe, str(e), on_fail)
+        if not chunk:
+            return self._fail(probe, "Conexão fechada antes do banner SSH", on_fail)
+        probe.buf += chunk
+        ident = find_ident(probe.buf)
+        if ident:
+            self.sel.unregister(sock)
+            sock.settimeout(READ_TIMEOUT)
+            probe.mark("banner", time.perf_counter())
+            on_ssh(probe.host, probe.port, probe.ip, sock, probe.buf, ident, probe.started, probe.phases)
+        elif len(probe.buf) > BANNER_MAX_BYTES:
+            self._fail(probe, "Banner SSH não encontrado", on_fail)
+
+# ---------- Motor: pool de threads (um worker por host) ----------
+class ThreadScanEngine:
+    name = "threads"
+
+    def __init__(self, opts: ScanOptions, workers=MAX_WORKERS_DEFAULT, prefilter=False,
+                 adaptive=False, adapt_min=ADAPT_MIN_DEFAULT, adapt_max=ADAPT_MAX_DEFAULT,
+                 lookahead=DNS_LOOKAHEAD):
+        self.opts = opts
+        self.lookahead = lookahead   # alvos lidos à frente das vagas (DNS antecipado)
+        # modo "banner": o pré-filtro já entrega o resultado completo, sem passar pelo pool
+        self.prefilter = prefilter or opts.mode == "banner"
+        self.controller = AdaptiveConcurrency(adapt_min, adapt_max) if adaptive else None
+        # adaptativo: o pool comporta o máximo da janela; quem limita é o controle
+        self.workers = self.controller.max_w if self.controller else max(1, int(workers))
+        # submetidos e não concluídos: os em execução + READY_QUEUE na fila do pool; alvos
+        # só são lidos quando abre vaga, então a memória não depende do tamanho da lista
+        self.window = self.controller or FixedWindow(self.workers + READY_QUEUE)
+        self.executor: ThreadPoolExecutor | None = None
+        self.stop_flag = threading.Event()
+        self.pause_gate = PauseGate()
+        self.closed = False   # após o Parar + CANCEL_GRACE, resultados atrasados são descartados
+
+    def window_info(self):
+        c = self.window
+        return (c.limit, c.in_flight)
+
+    @property
+    def paused(self): return self.pause_gate.paused
+    def pause(self): self.pause_gate.pause()
+    def resume(self): self.pause_gate.resume()
+
+    def _submit(self, emit, host, port, **kw):
+        try:
+            fut = self.executor.submit(test_ssh_host, host, port, self.opts, **kw)
+        except RuntimeError:   # pool já encerrado pelo Parar
+            self.window.cancel()
+            if kw.get("sock"): kw["sock"].close()
+            return
+
+        def done(f):
+            try: r = f.result()
+            except BaseException:   # fila descartada no Parar: só devolve a vaga
+                if kw.get("sock"): kw["sock"].close()
+                return self.window.cancel()
+            if not self.closed: emit(r)
+            self.window.release(r)   # depois do emit: o Parar espera a vaga, e com ela a linha
+        fut.add_done_callback(done)
+
+    def run(self, targets, emit):
+        """Bloqueia até terminar; emit(result) é chamado a partir dos workers."""
+        _WATCHDOG.reset()
+        self.closed = False
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        if self.prefilter:
+            # estágio 1 (selector) -> banner parcial na hora; só hosts SSH vão ao pool
+            def on_ssh(host, port, ip, sock, prebuf, ident, started, phases):
+                if self.opts.mode == "banner":
+                    sock.close()
+                    r = finish_banner(new_result(host, port, ip), ident, started, phases)
+                    if self.controller: self.controller.release(r)
+                    return emit(r)
+                emit(banner_result(host, port, ip, ident))
+                dl = self.opts.deadline(started)
+                dl.phases.update(phases)
+                if not self.controller: self.window.take()   # com o controle, a vaga vem do pré-filtro
+                self._submit(emit, host, port, sock=_ReplaySocket(sock, prebuf), ip=ip,
+                             started=started, deadline=dl)
+            BannerPrefilter(stop_flag=self.stop_flag, gate=self.controller, budgets=self.opts.phase_budgets,
+                            host_timeout=self.opts.host_timeout,
+                            downstream=None if self.controller else self.window,
+                            pause=self.pause_gate, lookahead=self.lookahead).run(targets, on_ssh, emit)
+        else:
+            for host, port in RESOLVER.prefetch(targets, self.lookahead):
+                # pausa antes de ocupar a vaga: o alvo já lido espera aqui e é o primeiro na retomada
+                if not self.pause_gate.wait(self.stop_flag): break
+                if not self.window.acquire(self.stop_flag): break
+                if self.stop_flag.is_set():
+                    self.window.cancel(); break
+                self._submit(emit, host, port)
+        if self.stop_flag.is_set():
+            # testes interrompidos terminam em milissegundos; quem passar da carência é largado
+            end = time.perf_counter() + CANCEL_GRACE
+            while self.window.in_flight and time.perf_counter() < end: time.sleep(0.01)
+            self.closed = True
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            # wait=True: garante que os done-callbacks (emit) já rodaram
+            self.executor.shutdown(wait=True)
+        self.executor = None
+        flush_known_hosts()
+
+    def stop(self):
+        """Parar: descarta a fila e aborta os testes em andamento; run() volta em até CANCEL_GRACE."""
+        self.stop_flag.set()
+        self.window.cancel_waiters()
+        executor = self.executor
+        if executor: executor.shutdown(wait=False, cancel_futures=True)
+        _WATCHDOG.cancel_all()
+
+# ---------- Motor: asyncio (connect/banner no event loop) ----------
+class AsyncScanEngine:
+    """
+    DNS, TCP connect e leitura do banner de milhares de hosts num único event loop;
+    só hosts que responderam "SSH-" ocupam uma das `workers` threads de KEX/auth
+    (paramiko é síncrono e cria uma thread própria por Transport).
+    """
+    name = "asyncio"
+
+    def __init__(self, opts: ScanOptions, workers=MAX_WORKERS_DEFAULT, prefilter=False,
+                 adaptive=False, adapt_min=ADAPT_MIN_DEFAULT, adapt_max=ADAPT_MAX_DEFAULT,
+                 in_flight=ASYNC_IN_FLIGHT_DEFAULT, lookahead=DNS_LOOKAHEAD):
+        self.opts = opts
+        self.lookahead = lookahead
+        self.workers = max(1, int(workers))
+        self.prefilter = prefilter
+        self.controller = AdaptiveConcurrency(adapt_min, adapt_max) if adaptive else None
+        self.in_flight = self.controller.max_w if self.controller else max(1, int(in_flight))
+        self.stop_flag = threading.Event()
+        self.pause_gate = PauseGate()
+        self._loop = None
+        self._pending = set()
+
+    def window_info(self):
+        c = self.controller
+        return (c.limit, c.in_flight) if c else None
+
+    @property
+    def paused(self): return self.pause_gate.paused
+    def pause(self): self.pause_gate.pause()
+    def resume(self): self.pause_gate.resume()
+
+    async def _gate(self):
+        while not self.controller.try_acquire():
+            if self.stop_flag.is_set(): return False
+            await asyncio.sleep(0.005)
+        return True
+
+    def run(self, targets, emit):
+        raise_nofile_limit()
+        _WATCHDOG.reset()
+        try:
+            asyncio.run(self._main(targets, emit))
+        finally:
+            self._loop = None
+            flush_known_hosts()
+
+    def stop(self):
+        """Parar: cancela as tarefas do loop e aborta o KEX/auth em andamento no pool."""
+        self.stop_flag.set()
+        _WATCHDOG.cancel_all()
+        loop = self._loop
+        if loop:
+            try: loop.call_soon_threadsafe(lambda: [t.cancel() for t in list(self._pending)])
+            except RuntimeError: pass   # loop já encerrado
+
+    async def _main(self, targets, emit):
+        self._loop = loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        sem = asyncio.Semaphore(self.in_flight)
+        self._pending = pending = set()
+        feed = TargetFeed(RESOLVER.prefetch(targets, self.lookahead), min(FEED_AHEAD, self.lookahead))
+        try:
+            while not self.stop_flag.is_set():
+                try:
+                    t = feed.get_nowait()
+                except queue.Empty:
+                    await asyncio.sleep(0.005); continue   # fonte lenta: o loop segue com as conexões
+                if t is None: break
+                host, port = t
+                await sem.acquire()
+                while self.pause_gate.paused and not self.stop_flag.is_set():
+                    await asyncio.sleep(0.1)
+                if self.stop_flag.is_set() or (self.controller and not await self._gate()):
+                    sem.release(); break
+                t = loop.create_task(self._one(loop, pool, host, port, emit))
+                pending.add(t)
+                t.add_done_callback(lambda t: (pending.discard(t), sem.release()))
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            feed.close()
+            pool.shutdown(wait=False)
+
+    async def _one(self, loop, pool, host, port, emit):
+        started = time.perf_counter()
+        dl = self.opts.deadline(started)
+        result = new_result(host, port)
+        sock = None
+        try:
+            addrs = await asyncio.wait_for(asyncio.wrap_future(RESOLVER.resolve_future(host)), dl.enter("dns"))
+            dl.enter("connect")
+            for i, (family, sa) in enumerate(addrs):
+                result["ip"] = sa[0]
+                sock = socket.socket(family, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                try:
+                    await asyncio.wait_for(loop.sock_connect(sock, with_port(sa, port)),
+                                           dl.deadline - time.perf_counter())
+                    break
+                except OSError as e:
+                    sock.close(); sock = None
+                    if i < len(addrs) - 1: continue
+                    if e.errno: dl.complete()   # como open_ident
+                    raise connect_error(e) from None
+            prebuf, ident = await asyncio.wait_for(read_ident_async(loop, sock), dl.enter("banner"))
+            if self.opts.mode == "banner":
+                dl.complete()
+                result = finish_banner(result, ident, started, dl.phases)
+            else:
+                if self.prefilter:
+                    emit(banner_result(host, port, result["ip"], ident))
+                sock.settimeout(READ_TIMEOUT)
+                # KEX/auth/comando (bloqueantes) num pool pequeno e fixo de threads
+                result = await loop.run_in_executor(pool, functools.partial(
+                    test_ssh_host, host, port, self.opts, sock=_ReplaySocket(sock, prebuf),
+                    ip=result["ip"], started=started, deadline=dl))
+                sock = None   # test_ssh_host fecha o socket
+        except asyncio.CancelledError:
+            result["error"] = ERR_CANCELLED   # Parar: a linha fica com o que já se sabia
+        except Exception as e:
+            phase = dl.timed_out_phase(e)
+            if dl.cancelled or isinstance(e, ScanCancelled):
+                result["error"] = ERR_CANCELLED
+            elif phase:
+                result["error"], result["timeout_phase"] = timeout_error(phase), phase
+            else:
+                result["error"] = str(e)
+        finally:
+            dl.finish()
+            if sock is not None:
+                sock.close()
+        if not result["time_ms"]:
+            result.update({f"{p}_ms": ms for p, ms in dl.phases.items()})
+            result["time_ms"] = int((time.perf_counter() - started) * 1000)
+        if self.controller: self.controller.release(result)
+        emit(result)
+
+# ---------- Motor: processos (shards, KEX em todos os núcleos) ----------
+SHARD_CHUNK = 64        # alvos por mensagem para os processos (no máximo `workers` por bloco)
+SHARD_LOOKAHEAD = 0     # o shard não lê à frente: bloco que ele não tem vaga para testar fica na fila para os outros
+RESULT_BATCH = 64       # resultados por mensagem de volta ao processo pai
+RESULT_FLUSH_S = 0.05
+
+def pack_result(r: dict):
+    """Tupla compacta (ordem de RESULT_COLUMNS + flag parcial) para o canal IPC."""
+    return tuple(r.get(c, "") for c in RESULT_COLUMNS) + (bool(r.get("partial")),)
+
+def unpack_result(t):
+    r = dict(zip(RESULT_COLUMNS, t))
+    if t[-1]: r["partial"] = True
+    return r
+
+def _iter_shard(task_q, stop_ev):
+    while not stop_ev.is_set():
+        try:
+            chunk = task_q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        if chunk is None: return
+        yield from chunk
+
+class _ParentClaims:
+    """KEY_CLAIMS de um shard: cada claim vai ao processo pai, que tem a tabela de todos os shards."""
+    def __init__(self, idx, req_q, rep_q):
+        self.idx, self.req_q, self.rep_q = idx, req_q, rep_q
+        self.waiting, self.seq, self.lock = {}, 0, threading.Lock()
+        threading.Thread(target=self._replies, daemon=True).start()
+
+    def _replies(self):
+        while True:
+            n, leader = self.rep_q.get()
+            with self.lock: fut = self.waiting.pop(n, None)
+            if fut: fut.set_result(leader)
+
+    def claim(self, fingerprint, port, host):
+        fut = Future()
+        with self.lock:
+            self.seq += 1; n = self.seq
+            self.waiting[n] = fut
+        self.req_q.put((self.idx, n, fingerprint, port, host))
+        return fut.result()
+
+    def clear(self): pass
+
+def _shard_worker(idx, inner, opts, workers, kw, task_q, res_q, stop_ev, pause_ev, claims=None):
+    global KEY_CLAIMS
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl+C no terminal: o Parar vem do pai (stop_ev)
+    if claims: KEY_CLAIMS = _ParentClaims(idx, *claims)   # dedup "key" vale entre os shards
+    engine = ENGINES.get(inner, ThreadScanEngine)(opts, workers, **kw)   # dedup fica no processo pai
+    batch, lock, done = [], threading.Lock(), threading.Event()
+    HOST_KEYS.fresh = []   # chaves completas vão ao pai; nas linhas só o fingerprint
+
+    def watch_stop():
+        # is_set() em laço, não stop_ev.wait(): um processo que sai bloqueado no wait deixa a
+        # contagem de "adormecidos" do Event desbalanceada e o set() do pai trava para sempre
+        while not done.wait(0.05):
+            if stop_ev.is_set():
+                engine.stop(); return
+            if pause_ev.is_set() != engine.paused:
+                engine.pause() if pause_ev.is_set() else engine.resume()
+    threading.Thread(target=watch_stop, daemon=True).start()
+
+    def flush():
+        with lock:
+            keys = HOST_KEYS.take_fresh()   # antes das linhas que citam a chave
+            if keys: res_q.put(("keys", idx, keys))
+            if batch:
+                res_q.put(batch[:]); batch.clear()
+
+    def send_window():
+        win = engine.window_info()
+        if win: res_q.put(("win", idx) + win)
+
+    def flusher():
+        while not done.wait(RESULT_FLUSH_S):
+            flush(); send_window()
+    threading.Thread(target=flusher, daemon=True).start()
+
+    def emit(r):
+        with lock:
+            batch.append(pack_result(r))
+            full = len(batch) >= RESULT_BATCH
+        if full: flush()
+
+    try:
+        engine.run(_iter_shard(task_q, stop_ev), emit)
+    finally:
+        done.set(); flush(); send_window()
+        res_q.put(None)
 
-# ---------- Splash Screen ----------
-class Splash(tk.Toplevel):
-    def __init__(self, master, timeout_ms=2000):
-        super().__init__(master)
-        self.overrideredirect(True)
-        self.attributes("-topmost", True)
-        frm = ttk.Frame(self, padding=18)
-        frm.pack(fill="both", expand=True)
+class ProcessScanEngine:
+    """
+    Divide os alvos entre N processos (contorna o GIL no KEX/cifra do paramiko);
+    cada processo roda o motor `inner` com `workers` threads. Alvos vão em blocos
+    de até SHARD_CHUNK por uma fila limitada e cada shard só tira um bloco quando o
+    motor dele tem vaga; resultados voltam em lotes de tuplas.
+    """
+    name = "processes"
 
-        img_lbl = None
-        if SPLASH_PNG_B64:
+    def __init__(self, opts: ScanOptions, workers=MAX_WORKERS_DEFAULT, processes=None,
+                 inner=ThreadScanEngine.name, **kw):
+        import multiprocessing as mp
+        self.ctx = mp.get_context("spawn")   # fork + Tk/threads do processo pai não é seguro
+        self.opts = opts
+        self.workers = max(1, int(workers))
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        self.inner = inner
+        self.kw = kw
+        self.stop_flag = threading.Event()
+        self.stop_ev = self.ctx.Event()
+        self.pause_ev = self.ctx.Event()   # repassado aos shards, que pausam os motores deles
+        self.pause_gate = PauseGate()      # segura o envio de blocos novos
+        self.windows = {}   # processo -> (janela, em voo), enviado pelos shards
+
+    def window_info(self):
+        if not self.windows: return None
+        return tuple(map(sum, zip(*self.windows.values())))
+
+    def stop(self):
+        self.stop_flag.set()
+        self.stop_ev.set()
+
+    @property
+    def paused(self): return self.pause_gate.paused
+
+    def pause(self):
+        self.pause_gate.pause(); self.pause_ev.set()
+
+    def resume(self):
+        self.pause_ev.clear(); self.pause_gate.resume()
+
+    def run(self, targets, emit):
+        task_q = self.ctx.Queue(maxsize=self.processes * 4)
+        res_q = self.ctx.Queue()
+        kw = dict(self.kw, lookahead=SHARD_LOOKAHEAD)
+        claim_q = self.ctx.Queue() if self.opts.dedup == "key" else None
+        reply_qs = [self.ctx.Queue() if claim_q else None for _ in range(self.processes)]
+        procs = [self.ctx.Process(target=_shard_worker, daemon=True,
+                                  args=(i, self.inner, self.opts, self.workers, kw, task_q, res_q, self.stop_ev, self.pause_ev,
+                                        (claim_q, reply_qs[i]) if claim_q else None))
+                 for i in range(self.processes)]
+        for p in procs: p.start()
+
+        def serve_claims():
+            # dedup "key": o pai responde pelo KEY_CLAIMS dele, o mesmo para todos os shards
+            for i, n, fp, port, host in iter(claim_q.get, None):
+                reply_qs[i].put((n, KEY_CLAIMS.claim(fp, port, host)))
+        if claim_q: threading.Thread(target=serve_claims, daemon=True).start()
+
+        def put(item):
+            if not self.pause_gate.wait(self.stop_flag): return False
+            while not self.stop_flag.is_set():
+                try:
+                    task_q.put(item, timeout=0.2); return True
+                except queue.Full:
+                    pass
+            return False
+
+        def feed():
+            chunk, size = [], min(SHARD_CHUNK, self.workers)
+            for t in targets:
+                chunk.append(t)
+                if len(chunk) >= size:
+                    if not put(chunk): return
+                    chunk = []
+            if chunk and not put(chunk): return
+            for _ in procs: put(None)
+        threading.Thread(target=feed, daemon=True).start()
+
+        alive = len(procs)
+        give_up = None
+        while alive:
+            if self.stop_flag.is_set():   # Parar: os shards têm a carência deles e mais um pouco
+                give_up = give_up or time.perf_counter() + CANCEL_GRACE + 0.3
+                if time.perf_counter() > give_up: break
             try:
-                import tkinter as tk_
-                img_data = base64.b64decode(SPLASH_PNG_B64)
-                self._splash_img = tk_.PhotoImage(data=img_data)
-                img_lbl = ttk.Label(frm, image=self._splash_img)
-                img_lbl.pack()
-            except Exception:
-                pass
+                batch = res_q.get(timeout=0.1)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs): break
+                continue
+            if batch is None:
+                alive -= 1; continue
+            if isinstance(batch, tuple):   # ("win", processo, janela, em voo) / ("keys", processo, chaves)
+                if batch[0] == "keys": HOST_KEYS.merge(batch[2])
+                else: self.windows[batch[1]] = batch[2:]
+                continue
+            for t in batch:
+                emit(unpack_result(t))
+        for p in procs:
+            p.join(timeout=0.1 if self.stop_flag.is_set() else 1)
+            if p.is_alive() and self.stop_flag.is_set(): p.terminate()
+        if claim_q: claim_q.put(None)
 
-        ttk.Label(frm, text=APP_TITLE, font=("Segoe UI", 16, "bold")).pack(pady=(8, 2))
-        ttk.Label(frm, text=f"Versão {VERSION}  •  {LICENSE}", foreground="#777").pack()
-        ttk.Label(frm, text="Inicializando…", foreground="#555").pack(pady=(6, 0))
-        self.update_idletasks()
+ENGINES = {ThreadScanEngine.name: ThreadScanEngine, AsyncScanEngine.name: AsyncScanEngine}
 
-        # centraliza
-        w, h = 420, 220
-        sw = self.winfo_screenwidth()
-        sh = self.winfo_screenheight()
-        self.geometry(f"{w}x{h}+{(sw-w)//2}+{(sh-h)//2}")
-        set_app_icon(self)
+def make_engine(name, opts: ScanOptions, workers=MAX_WORKERS_DEFAULT, processes=1, **kw):
+    """
+    processes > 1: o motor `name` roda em cada um dos N processos (ProcessScanEngine).
+    opts.dedup != "off": envolto em DedupScanEngine.
+    """
+    if processes and int(processes) > 1:
+        engine = ProcessScanEngine(opts, workers, processes=processes, inner=name, **kw)
+    else:
+        engine = ENGINES.get(name, ThreadScanEngine)(opts, workers, **kw)
+    return DedupScanEngine(engine, opts.dedup) if opts.dedup in DEDUP_MODES[1:] else engine
 
-        # fecha em timeout
-        self.after(timeout_ms, self.destroy)
+# ---------- Deduplicação por identidade do servidor ----------
+def target_label(host, port):
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
 
-# ---------- Carregar chave privada (opcional) ----------
-def load_pkey(path: str, passphrase: str | None):
-    loaders = (
-        paramiko.RSAKey.from_private_key_file,
-        paramiko.ECDSAKey.from_private_key_file,
-        paramiko.Ed25519Key.from_private_key_file,
-        paramiko.DSSKey.from_private_key_file,
-    )
-    last = None
-    for L in loaders:
-        try:
-            return L(path, password=passphrase or None)
-        except Exception as e:
-            last = e
-    raise last or RuntimeError("Falha ao carregar chave privada.")
+class SameServerKey(Exception):
+    """Host key já vista nesta porta (dedup "key"): o teste completo fica com o líder."""
+    def __init__(self, leader, hostkey_status=""):
+        super().__init__(f"Mesma host key de {leader}")
+        self.leader, self.hostkey_status = leader, hostkey_status
 
-# ---------- Autenticação (prioriza Transport.auth_password) ----------
-from paramiko import AuthenticationException, SSHException
+class KeyClaims:
+    """(fingerprint, porta) -> "host:porta" do primeiro host que mostrou a chave."""
+    def __init__(self):
+        self.owners = {}
+        self.lock = threading.Lock()
 
-def try_auth_with_fallback(host, port, username, password, pkey_obj,
-                           accept_unknown_hostkey, verify_command, kbi_enable):
+    def claim(self, fingerprint, port, host):
+        """None se este host é o líder da chave; senão o rótulo do líder."""
+        me = target_label(host, port)
+        with self.lock:
+            if (fingerprint, port) not in self.owners and len(self.owners) >= DEDUP_MAX:
+                del self.owners[next(iter(self.owners))]   # a chave mais antiga
+            owner = self.owners.setdefault((fingerprint, port), me)
+        return None if owner == me else owner
+
+    def clear(self):
+        with self.lock: self.owners.clear()
+
+KEY_CLAIMS = KeyClaims()
+
+class DedupScanEngine:
     """
-    Retorna: ok, latency_ms, banner, fingerprint, auth_method, stdout, stderr
+    Um teste completo por servidor: alvos que resolvem para o mesmo endereço+porta (nome
+    curto, FQDN, IP, CNAMEs de um VIP) viram apelidos do primeiro e nem conectam; com
+    mode "key", hosts que mostram a mesma host key na mesma porta param logo após o KEX.
+    O resultado do líder é copiado para cada apelido com inherited_from = líder.
+    "key" também junta máquinas clonadas com a mesma host key; use só quando isso é desejado.
+    Memória: endereços, chaves e resultados de até DEDUP_MAX servidores; um apelido que chega
+    depois que o líder saiu é testado de novo. waiting e running só têm alvos em teste.
     """
-    banner = fingerprint = auth_method = ""
-    cmd_out = cmd_err = ""
-    ok = False
-    latency_ms = None
+    def __init__(self, inner, mode="addr"):
+        self.inner, self.mode, self.name = inner, mode, inner.name
+        self.stop_flag = threading.Event()
+        self.lock = threading.Lock()
+        self.by_addr = {}     # (ip, porta) -> líder
+        self.running = set()  # alvos entregues ao motor e ainda sem resultado
+        self.waiting = {}     # líder -> [(host, porta, campos próprios)] até o resultado chegar
+        self.done = {}        # líder testado -> resultado final (tupla de pack_result)
 
-    t0 = time.perf_counter()
-    # TCP
-    sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
-    tr = paramiko.Transport(sock)
-    tr.start_client(timeout=READ_TIMEOUT)
+    def window_info(self):
+        return self.inner.window_info()
 
-    # banner/fingerprint
-    try:
-        b = tr.get_banner()
-        banner = b if isinstance(b, str) else (b.decode(errors="ignore") if b else "")
-    except Exception:
-        banner = ""
-    try:
-        key = tr.get_remote_server_key()
-        fingerprint = key.get_base64()
-    except Exception:
-        fingerprint = ""
+    def stop(self):
+        self.stop_flag.set()
+        self.inner.stop()
 
-    # política de host key (simples): se não aceita desconhecida e não há fingerprint, aborta
-    if not accept_unknown_hostkey and not fingerprint:
-        tr.close()
-        raise SSHException("Host key desconhecida (AutoAddPolicy desativado)")
+    @property
+    def paused(self): return self.inner.paused
+    def pause(self): self.inner.pause()
+    def resume(self): self.inner.resume()
 
-    # 1) password direto (comportamento que resolveu seu caso)
-    try:
-        if username:
-            tr.auth_password(username, password or "")
-            latency_ms = int((time.perf_counter() - t0) * 1000)
-            auth_method = "password"
-            ok = True
-    except AuthenticationException as e:
-        allowed = getattr(e, "allowed_types", []) or []
-        # 2) fallback: keyboard-interactive com mesma senha
-        if kbi_enable and ("keyboard-interactive" in allowed) and password:
-            try:
-                tr.auth_interactive_dumb(username, password)
-                latency_ms = int((time.perf_counter() - t0) * 1000)
-                auth_method = "keyboard-interactive"
-                ok = True
-            except Exception:
-                tr.close()
-                raise
-        else:
-            tr.close()
-            raise
-    except Exception:
-        tr.close()
-        raise
+    def run(self, targets, emit):
+        KEY_CLAIMS.clear()
+        self.stop_flag.clear()
+        self.inner.run(self._targets(targets, emit), lambda r: self._emit(r, emit))
 
-    # comando opcional
-    if ok and verify_command:
-        chan = tr.open_session(timeout=READ_TIMEOUT)
-        chan.exec_command(verify_command)
+    def _targets(self, targets, emit):
+        """
+        Agrupa por (ip, porta) sem esperar o DNS de cada alvo na ordem: até DNS_LOOKAHEAD
+        alvos ficam com a consulta pendente e quem resolve primeiro segue primeiro.
+        """
+        it, exhausted = iter(targets), False
+        pend, n = {}, 0         # Future -> (início, [(host, porta)]), na ordem de envio
+        ready = queue.Queue()   # Futures concluídos
+        while not self.stop_flag.is_set():
+            while not exhausted and n < DNS_LOOKAHEAD:
+                t = next(it, None)
+                if t is None:
+                    exhausted = True; break
+                fut = RESOLVER.resolve_future(t[0])
+                if fut.done():
+                    yield from self._group(*t, fut, emit); continue
+                if fut not in pend:
+                    pend[fut] = (time.perf_counter(), [])
+                    fut.add_done_callback(ready.put)
+                pend[fut][1].append(t); n += 1
+            if not pend: return
+            try: batch = [ready.get(timeout=0.1)]
+            except queue.Empty: batch = []
+            while not ready.empty(): batch.append(ready.get_nowait())
+            now = time.perf_counter()
+            for fut in list(islice(pend, 64)):   # prazo de DNS vencido: segue sem agrupar
+                if now - pend[fut][0] <= DNS_TIMEOUT: break
+                batch.append(fut)
+            for fut in batch:
+                _, group = pend.pop(fut, (0, ()))
+                n -= len(group)
+                for host, port in group:
+                    yield from self._group(host, port, fut, emit)
+
+    def _group(self, host, port, fut, emit):
+        label = target_label(host, port)
         try:
-            cmd_out = chan.makefile("r", -1).read().decode(errors="ignore").strip()
-            cmd_err = chan.makefile_stderr("r", -1).read().decode(errors="ignore").strip()
-        finally:
-            chan.close()
+            ip = fut.result(timeout=0)[0][1][0]
+        except Exception:   # o erro de DNS sai no teste do próprio host
+            with self.lock: self.running.add(label)
+            yield host, port; return
+        with self.lock:
+            leader = self.by_addr.get((ip, port))
+        if leader is not None and self._alias(leader, host, port, {"ip": ip}, emit): return
+        with self.lock:   # primeiro do endereço, ou o líder já foi esquecido
+            self._keep(self.by_addr, (ip, port), label)
+            self.running.add(label)
+        yield host, port
 
-    tr.close()
-    return ok, latency_ms, banner, fingerprint, auth_method, cmd_out, cmd_err
+    @staticmethod
+    def _keep(d, key, value):
+        if key not in d and len(d) >= DEDUP_MAX:
+            del d[next(iter(d))]   # o mais antigo inserido
+        d[key] = value
 
-# ---------- Worker ----------
-def test_ssh_host(host, port, username, password, pkey_path, passphrase,
-                  accept_unknown_hostkey, verify_command, kbi_enable):
-    started = time.perf_counter()
-    try:
-        ip = socket.gethostbyname(host)
-    except Exception:
-        ip = ""
+    def _alias(self, leader, host, port, own, emit):
+        """False se o líder não está em teste nem lembrado: o alvo segue por conta própria."""
+        with self.lock:
+            t = self.done.get(leader)
+            if t is None:
+                if leader not in self.running: return False
+                self.waiting.setdefault(leader, []).append((host, port, own)); return True
+        self._publish(self._inherit(t, leader, host, port, own), emit)
+        return True
 
-    result = {
-        "host": host, "ip": ip, "port": port,
-        "ok": False, "latency_ms": "", "time_ms": 0,
-        "banner": "", "fingerprint": "", "auth_method": "",
-        "cmd_stdout": "", "cmd_stderr": "", "error": ""
-    }
+    @staticmethod
+    def _inherit(t, leader, host, port, own):
+        r = unpack_result(t)
+        # líder que também herdou (mesma host key): aponta para quem fez o teste
+        r.update(host=host, port=port, inherited_from=r.get("inherited_from") or leader,
+                 **{k: v for k, v in own.items() if v})
+        return r
 
-    try:
-        pkey_obj = load_pkey(pkey_path, passphrase) if pkey_path else None
-        ok, lat, ban, fp, method, out, err = try_auth_with_fallback(
-            host, port, (username or "").strip(), (password or ""),
-            pkey_obj, accept_unknown_hostkey, (verify_command or ""), kbi_enable
-        )
-        result.update({
-            "ok": ok, "latency_ms": lat, "banner": ban,
-            "fingerprint": fp, "auth_method": method,
-            "cmd_stdout": out, "cmd_stderr": err
-        })
-    except AuthenticationException as e:
-        result["error"] = f"Auth falhou: {e}"
-    except socket.timeout:
-        result["error"] = "Timeout de conexão"
-    except Exception as e:
-        result["error"] = str(e)
-    finally:
-        result["time_ms"] = int((time.perf_counter() - started) * 1000)
-    return result
+    def _publish(self, r, emit):
+        """Emite o resultado final do alvo e o repassa aos apelidos que o aguardavam."""
+        label, t = target_label(r["host"], r["port"]), pack_result(r)
+        with self.lock:
+            if label in self.running:   # só quem foi entregue ao motor pode ser líder
+                self.running.discard(label)
+                self._keep(self.done, label, t)
+            aliases = self.waiting.pop(label, ())
+        emit(r)
+        for host, port, own in aliases:
+            self._publish(self._inherit(t, label, host, port, own), emit)
+
+    def _emit(self, r, emit):
+        if r.get("partial"): return emit(r)
+        if r.get("inherited_from"):   # SameServerKey: parou no KEX, herda do líder
+            own = {"ip": r.get("ip"), "hostkey_status": r.get("hostkey_status")}
+            if self._alias(r["inherited_from"], r["host"], r["port"], own, emit): return
+        self._publish(r, emit)   # líder esquecido: fica o que o próprio teste viu
+
+# ---------- Filtro da tabela (índice de busca incremental) ----------
+class FilterIndex:
+    """
+    Texto de busca (minúsculo) de cada linha, montado uma vez quando a linha chega ou muda,
+    e a visibilidade atual. Trocar o filtro devolve só as linhas que mudaram: se o texto novo
+    contém o anterior, só as visíveis são testadas; se está contido nele, só as escondidas.
+    """
+    # ✔/✖ fora do Latin-1 fariam cada texto ocupar 2 bytes por caractere (e a busca ficar
+    # mais lenta); viram caracteres de controle no texto e no filtro digitado
+    FOLD = str.maketrans({"✔": "\x01", "✖": "\x02"})
+
+    def __init__(self, needle=""):
+        self.text = []           # linha -> texto de busca
+        self.vis = bytearray()   # linha -> 1 se visível
+        self.shown = array("I")  # linhas visíveis, em ordem crescente
+        self.needle = needle.translate(self.FOLD)
+
+    def __len__(self):
+        return len(self.text)
+
+    def haystack(self, vals):
+        return " ".join(map(str, vals)).lower().translate(self.FOLD)
+
+    def add(self, vals):
+        """Nova linha no fim; devolve (linha, visível)."""
+        t = self.haystack(vals)
+        row, v = len(self.text), self.needle in t
+        self.text.append(t); self.vis.append(v)
+        if v: self.shown.append(row)
+        return row, v
+
+    def update(self, row, vals):
+        """Novo conteúdo da linha; devolve True/False se a visibilidade mudou, senão None."""
+        t = self.text[row] = self.haystack(vals)
+        v = self.needle in t
+        if v == self.vis[row]: return None
+        self.vis[row] = v
+        if v: insort(self.shown, row)
+        else: del self.shown[bisect_left(self.shown, row)]
+        return v
+
+    def set_needle(self, needle):
+        """Aplica o filtro; devolve (mostrar, esconder), linhas em ordem crescente."""
+        needle = needle.translate(self.FOLD)
+        old, self.needle = self.needle, needle
+        text, vis = self.text, self.vis
+        if needle == old: return [], []
+        if old in needle:     # restringiu: só visíveis podem sumir
+            keep, hide = [], []
+            for i in self.shown: (keep if needle in text[i] else hide).append(i)
+            for i in hide: vis[i] = 0
+            self.shown = array("I", keep)
+            return [], hide
+        if needle in old:     # ampliou: só escondidas podem aparecer
+            show = [i for i, t in enumerate(text) if not vis[i] and needle in t]
+            for i in show: vis[i] = 1
+            self.shown = array("I", sorted([*self.shown, *show]))   # duas sequências ordenadas: merge linear
+            return show, []
+        show, hide, shown = [], [], array("I")
+        for i, t in enumerate(text):
+            v = needle in t
+            if v != vis[i]:
+                (show if v else hide).append(i); vis[i] = v
+            if v: shown.append(i)
+        self.shown = shown
+        return show, hide
+
+# ---------- Tabela virtual (itens do Tk só para as linhas na tela) ----------
+class VirtualTable(ttk.Frame):
+    """
+    Treeview com um item por linha que cabe na altura atual: a cada rolagem os mesmos itens
+    recebem os valores da nova janela. A barra de rolagem reflete o total lógico de linhas.
+    rows(): linhas na ordem de exibição; values(linha): tupla na ordem das colunas;
+    on_sort(coluna, shift): clique num cabeçalho.
+    """
+    def __init__(self, master, columns, headers, widths, rows, values, on_sort=None):
+        super().__init__(master)
+        self.rows, self.values = rows, values
+        self.columns, self.headers = tuple(columns), headers
+        self.top = 0
+        self.pool = []         # iids fixos, na ordem da tela
+        self.shown = {}        # iid anexado -> valores exibidos (evita reescrever o que não mudou)
+        self.selected = None   # linha lógica selecionada (sobrevive à rolagem)
+        self.row_h, self.head_h = 20, 24   # estimativa até medir pelo bbox de um item na tela
+        self.measured = self.fit_pending = False
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse", height=1)
+        for c in columns:
+            self.tree.heading(c, text=headers[c])
+            self.tree.column(c, width=widths[c], anchor="w")
+        self.tree.pack(side="left", expand=True, fill="both")
+        self.sb = ttk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.sb.pack(side="right", fill="y")
+        t = self.tree
+        t.bind("<Configure>", lambda e: self._fit())
+        t.bind("<<TreeviewSelect>>", self._on_select)
+        t.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        t.bind("<Button-4>", lambda e: self.scroll(-3))
+        t.bind("<Button-5>", lambda e: self.scroll(3))
+        t.bind("<Up>", lambda e: self.scroll(-1))
+        t.bind("<Down>", lambda e: self.scroll(1))
+        t.bind("<Prior>", lambda e: self.scroll(-max(1, len(self.pool) - 1)))
+        t.bind("<Next>", lambda e: self.scroll(max(1, len(self.pool) - 1)))
+        t.bind("<Home>", lambda e: self.scroll(-self.top))
+        t.bind("<End>", lambda e: self.scroll(len(self.rows())))
+        if on_sort: t.bind("<ButtonRelease-1>", lambda e: self._heading_click(e, on_sort))
+
+    def _heading_click(self, e, on_sort):
+        if self.tree.identify_region(e.x, e.y) != "heading": return
+        col = self.tree.identify_column(e.x)   # "#n", n a partir de 1
+        on_sort(self.columns[int(col[1:]) - 1], bool(e.state & 0x0001))
+
+    def mark_sort(self, sort):
+        """▲/▼ nos cabeçalhos ordenados (com a prioridade, se há mais de uma coluna)."""
+        rank = {c: (i, desc) for i, (c, desc) in enumerate(sort)}
+        for c in self.columns:
+            i, desc = rank.get(c, (None, False))
+            mark = "" if i is None else (" ▼" if desc else " ▲") + (str(i + 1) if len(sort) > 1 else "")
+            self.tree.heading(c, text=self.headers[c] + mark)
+
+    def _fit(self):
+        """Ajusta o número de itens do Tk às linhas que cabem na altura da Treeview."""
+        self.fit_pending = False
+        box = self.tree.bbox(self.pool[0]) if self.pool and self.pool[0] in self.shown else None
+        if box: self.head_h, self.row_h, self.measured = box[1], box[3], True
+        n = max(1, (self.tree.winfo_height() - self.head_h) // max(1, self.row_h))
+        while len(self.pool) < n:   # item novo fica desanexado até receber uma linha
+            self.pool.append(self.tree.insert("", "end", values=()))
+            self.tree.detach(self.pool[-1])
+        if len(self.pool) > n:
+            extra, self.pool = self.pool[n:], self.pool[:n]
+            self.tree.delete(*extra)
+            for iid in extra: self.shown.pop(iid, None)
+        self.refresh()
+
+    def refresh(self):
+        """Reescreve a janela visível (só os itens cujo conteúdo mudou) e a barra de rolagem."""
+        rows, pool, tree = self.rows(), self.pool, self.tree
+        n, size = len(rows), len(self.pool)
+        self.top = max(0, min(self.top, n - size))
+        sel = ()
+        for k, iid in enumerate(pool):
+            i = self.top + k
+            if i >= n:
+                if self.shown.pop(iid, None) is not None: tree.detach(iid)
+                continue
+            row = rows[i]
+            vals = self.values(row)
+            old = self.shown.get(iid)
+            if old != vals:
+                if old is None: tree.reattach(iid, "", k)
+                tree.item(iid, values=vals)
+                self.shown[iid] = vals
+            if row == self.selected: sel = (iid,)
+        if tuple(tree.selection()) != sel: tree.selection_set(sel)
+        self.sb.set(self.top / n, min(1.0, (self.top + size) / n)) if n else self.sb.set(0.0, 1.0)
+        if self.shown and not (self.measured or self.fit_pending):
+            self.fit_pending = True
+            self.after(50, self._fit)   # primeiro item desenhado: mede a altura real da linha
+
+    def scroll(self, units):
+        self.top += units
+        self.refresh()
+        return "break"
+
+    def _yview(self, *args):
+        n = len(self.rows())
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * n)
+        elif args[0] == "scroll":
+            self.top += int(args[1]) * (max(1, len(self.pool) - 1) if args[2] == "pages" else 1)
+        self.refresh()
+
+    def _on_select(self, _e=None):
+        sel = self.tree.selection()
+        if not sel or sel[0] not in self.pool: return
+        i = self.top + self.pool.index(sel[0])
+        rows = self.rows()
+        if i < len(rows): self.selected = rows[i]
+
+# ---------- Responsividade da GUI (atraso do loop do Tk) ----------
+class UiLag:
+    """
+    Por tick do _poll_queue: atraso em relação ao agendado + tempo gasto no lote (ms), ou
+    seja, o máximo que um clique ou tecla espera na fila de eventos do Tk naquele tick.
+    """
+    def __init__(self, n=2000):
+        self.samples = deque(maxlen=n)
+        self.worst = 0.0
+        self.due = self.t0 = None
+
+    def reset(self):
+        self.samples.clear(); self.worst = 0.0
+
+    def begin(self):
+        self.t0 = time.perf_counter()
+        return self.t0
+
+    def end(self, next_ms):
+        now = time.perf_counter()
+        if self.due is not None:
+            lag = (max(0.0, self.t0 - self.due) + now - self.t0) * 1000
+            self.samples.append(lag); self.worst = max(self.worst, lag)
+        self.due = now + next_ms / 1000
+
+    def percentile(self, q):
+        if not self.samples: return 0.0
+        s = sorted(self.samples)
+        return s[max(0, math.ceil(q / 100 * len(s)) - 1)]
+
+    def text(self):
+        return f"UI p99 {self.percentile(99):.0f} ms" if self.samples else ""
 
 # ---------- Janela Sobre ----------
 class AboutWindow(tk.Toplevel):
@@ -277,21 +2796,53 @@ class App(tk.Tk):
 
         # Estado
         self.q = queue.Queue()
-        self.executor: ThreadPoolExecutor | None = None
-        self.futures = []
-        self.stop_flag = threading.Event()
+        self.engine = None
+        self._partial_rows = {}   # (host, porta) -> [linha] de linhas só com banner
+        self.store = ResultStore()
+        self.findex = FilterIndex()
+        self._filter_job = None
+        self.sort = []            # [(coluna, decrescente)], a primeira é a principal
+        self.order = None         # todas as linhas na ordem do sort (array)
+        self.view = None          # as visíveis na ordem do sort; None = order (sem filtro)
+        self._sort_key = None
+        self._pending = set()     # linhas novas/alteradas ainda fora de order/view
+        self._target_file = None  # lista importada grande: lida do arquivo na hora do teste
+        self._target_count = None
+        self._stop_t0 = None      # instante do Parar (mede o tempo até "Cancelado")
+        self.stats = PhaseStats()
+        self.scan_progress = ScanProgress()
+        self.ui_lag = UiLag()
+        self._status_t = 0.0      # última atualização da barra de status durante o teste
 
         self.var_port = tk.IntVar(value=DEFAULT_PORT)
         self.var_workers = tk.IntVar(value=MAX_WORKERS_DEFAULT)
+        self.var_engine = tk.StringVar(value=ThreadScanEngine.name)
+        self.var_prefilter = tk.BooleanVar(value=False)
+        self.var_procs = tk.IntVar(value=1)
+        self.var_adaptive = tk.BooleanVar(value=False)
+        self.var_adapt_min = tk.IntVar(value=ADAPT_MIN_DEFAULT)
+        self.var_adapt_max = tk.IntVar(value=ADAPT_MAX_DEFAULT)
+        self.var_host_timeout = tk.DoubleVar(value=HOST_TIMEOUT)
+        self._status_base = None   # texto do status enquanto há teste em andamento
         self.var_username = tk.StringVar(value="")
         self.var_password = tk.StringVar(value="")
         self.var_key = tk.StringVar(value="")
         self.var_passphrase = tk.StringVar(value="")
         self.var_accept_unknown = tk.BooleanVar(value=True)
         self.var_kbi = tk.BooleanVar(value=True)
+        self.var_mode = tk.StringVar(value="full")
+        self.var_probe = tk.BooleanVar(value=False)
+        self.var_algos = tk.StringVar(value="default")
+        self.var_known_hosts = tk.StringVar(value="")
+        self.var_tofu = tk.BooleanVar(value=False)
+        self.var_kh_sweep = tk.BooleanVar(value=False)
+        self.var_dedup = tk.StringVar(value="off")
+        self.var_agent = tk.BooleanVar(value=bool(os.environ.get("SSH_AUTH_SOCK")))
         self.var_cmd = tk.StringVar(value="")
         self.var_filter = tk.StringVar(value="")
         self.var_status = tk.StringVar(value="Pronto")
+        self.var_source = tk.StringVar(value="")
+        self.var_pause = tk.StringVar(value="Pausar")
 
         self._build_ui()
         self._poll_queue()
@@ -302,6 +2853,7 @@ class App(tk.Tk):
         m_file = tk.Menu(menubar, tearoff=0)
         m_file.add_command(label="Importar lista…", command=self.on_import)
         m_file.add_command(label="Exportar CSV…", command=self.on_export)
+        m_file.add_command(label="Exportar host keys…", command=self.on_export_keys)
         m_file.add_separator()
         m_file.add_command(label="Sair", command=self.destroy)
         menubar.add_cascade(label="Arquivo", menu=m_file)
@@ -313,7 +2865,10 @@ class App(tk.Tk):
 
         # Hosts
         top = ttk.Frame(self, padding=10); top.pack(fill="x")
-        ttk.Label(top, text="Hosts (um por linha; aceita host ou host:porta):").grid(row=0, column=0, sticky="w")
+        ttk.Label(top, text="Hosts (um por linha: host, host:22,2222, [IPv6]:porta, 10.0.0.0/24, 10.0.0.10-200):").grid(row=0, column=0, sticky="w")
+        ttk.Label(top, textvariable=self.var_source).grid(row=0, column=1, columnspan=5, sticky="w", padx=(12,0))
+        self.btn_edit_hosts = ttk.Button(top, text="Editar lista", command=lambda: self._set_target_file(None))
+        self.btn_edit_hosts.grid(row=0, column=6, sticky="e"); self.btn_edit_hosts.grid_remove()
         self.txt_hosts = tk.Text(top, height=6)
         self.txt_hosts.grid(row=1, column=0, columnspan=7, sticky="nsew", pady=(4,8))
         top.grid_columnconfigure(6, weight=1)
@@ -335,6 +2890,13 @@ class App(tk.Tk):
         ttk.Entry(cred, textvariable=self.var_passphrase, show="•", width=18).grid(row=1, column=5, sticky="w", pady=(8,0))
         ttk.Checkbutton(cred, text="Aceitar host key desconhecida (AutoAddPolicy)", variable=self.var_accept_unknown).grid(row=2, column=0, columnspan=6, sticky="w", pady=(8,0))
         ttk.Checkbutton(cred, text="Tentar keyboard-interactive (fallback)", variable=self.var_kbi).grid(row=3, column=0, columnspan=6, sticky="w")
+        ttk.Checkbutton(cred, text="Usar chaves do ssh-agent", variable=self.var_agent).grid(row=4, column=0, columnspan=6, sticky="w")
+        ttk.Label(cred, text="known_hosts:").grid(row=5, column=0, sticky="w", pady=(8,0))
+        ttk.Entry(cred, textvariable=self.var_known_hosts, width=40).grid(row=5, column=1, columnspan=2, sticky="w", pady=(8,0))
+        ttk.Button(cred, text="Selecionar…", command=self._choose_known_hosts).grid(row=5, column=3, sticky="w", pady=(8,0))
+        ttk.Checkbutton(cred, text="Gravar novas (TOFU)", variable=self.var_tofu).grid(row=5, column=4, columnspan=2, sticky="w", pady=(8,0))
+        ttk.Checkbutton(cred, text="Nomes hasheados: separar chave trocada de host novo (um HMAC por linha)",
+                        variable=self.var_kh_sweep).grid(row=6, column=1, columnspan=5, sticky="w")
 
         # Opções
         opts = ttk.LabelFrame(self, text="Opções de teste", padding=10)
@@ -347,29 +2909,48 @@ class App(tk.Tk):
         ttk.Entry(opts, textvariable=self.var_cmd, width=32).grid(row=0, column=5, sticky="w", padx=(4,0))
         ttk.Button(opts, text="Testar", command=self.on_test).grid(row=0, column=6, sticky="e", padx=(10,0))
         ttk.Button(opts, text="Parar", command=self.on_stop).grid(row=0, column=7, sticky="w")
+        ttk.Button(opts, textvariable=self.var_pause, command=self.on_pause).grid(row=0, column=8, sticky="w")
+        ttk.Label(opts, text="Motor:").grid(row=1, column=0, sticky="w", pady=(8,0))
+        ttk.Combobox(opts, textvariable=self.var_engine, values=list(ENGINES), state="readonly", width=10).grid(row=1, column=1, sticky="w", padx=(4,16), pady=(8,0))
+        ttk.Label(opts, text="Processos:").grid(row=1, column=2, sticky="w", pady=(8,0))
+        ttk.Spinbox(opts, from_=1, to=max(1, (os.cpu_count() or 1) * 2), textvariable=self.var_procs, width=6).grid(row=1, column=3, sticky="w", padx=(4,16), pady=(8,0))
+        ttk.Checkbutton(opts, text="Pré-filtro TCP+banner (só hosts SSH vão ao KEX/auth)", variable=self.var_prefilter).grid(row=1, column=4, columnspan=4, sticky="w", pady=(8,0))
+        ttk.Checkbutton(opts, text="Concorrência adaptativa", variable=self.var_adaptive).grid(row=2, column=0, columnspan=2, sticky="w", pady=(8,0))
+        ttk.Label(opts, text="Mín:").grid(row=2, column=2, sticky="w", pady=(8,0))
+        ttk.Spinbox(opts, from_=1, to=5000, textvariable=self.var_adapt_min, width=6).grid(row=2, column=3, sticky="w", padx=(4,16), pady=(8,0))
+        ttk.Label(opts, text="Máx:").grid(row=2, column=4, sticky="w", pady=(8,0))
+        ttk.Spinbox(opts, from_=1, to=5000, textvariable=self.var_adapt_max, width=6).grid(row=2, column=5, sticky="w", padx=(4,0), pady=(8,0))
+        ttk.Label(opts, text="Limite por host (s):").grid(row=2, column=6, sticky="e", padx=(10,0), pady=(8,0))
+        ttk.Spinbox(opts, from_=1, to=3600, textvariable=self.var_host_timeout, width=6).grid(row=2, column=7, sticky="w", pady=(8,0))
+        ttk.Label(opts, text="Modo:").grid(row=3, column=0, sticky="w", pady=(8,0))
+        ttk.Combobox(opts, textvariable=self.var_mode, values=list(SCAN_MODES), state="readonly", width=10).grid(row=3, column=1, sticky="w", padx=(4,16), pady=(8,0))
+        ttk.Checkbutton(opts, text='Sondar métodos (auth "none") antes das credenciais', variable=self.var_probe).grid(row=3, column=2, columnspan=4, sticky="w", pady=(8,0))
+        ttk.Label(opts, text="Algoritmos:").grid(row=3, column=6, sticky="e", padx=(10,0), pady=(8,0))
+        ttk.Combobox(opts, textvariable=self.var_algos, values=list(ALGO_PROFILES), state="readonly", width=8).grid(row=3, column=7, sticky="w", pady=(8,0))
+        ttk.Label(opts, text="Deduplicar:").grid(row=4, column=0, sticky="w", pady=(8,0))
+        ttk.Combobox(opts, textvariable=self.var_dedup, values=list(DEDUP_MODES), state="readonly", width=10).grid(row=4, column=1, sticky="w", padx=(4,16), pady=(8,0))
+        ttk.Label(opts, text='addr: um teste por endereço+porta; key: também por host key (junta clones)').grid(row=4, column=2, columnspan=6, sticky="w", pady=(8,0))
 
         # Filtro/IO
         io = ttk.Frame(self, padding=(10,6,10,0)); io.pack(fill="x")
         ttk.Label(io, text="Filtro:").pack(side="left")
         ent_filter = ttk.Entry(io, textvariable=self.var_filter, width=40)
         ent_filter.pack(side="left", padx=(4,10))
-        self.var_filter.trace_add("write", lambda *_: self._apply_filter())
+        self.var_filter.trace_add("write", lambda *_: self._schedule_filter())
         ttk.Button(io, text="Importar lista…", command=self.on_import).pack(side="left")
         ttk.Button(io, text="Exportar CSV…", command=self.on_export).pack(side="left", padx=(6,0))
         ttk.Button(io, text="Sobre", command=lambda: AboutWindow(self)).pack(side="right")
 
         # Tabela
         table = ttk.Frame(self, padding=10); table.pack(expand=True, fill="both")
-        cols = ("host","ip","port","ok","latency_ms","time_ms","auth_method","banner","fingerprint","cmd_stdout","cmd_stderr","error")
-        headers = {"host":"Host","ip":"IP","port":"Porta","ok":"OK","latency_ms":"Latência (ms)","time_ms":"Total (ms)","auth_method":"Auth","banner":"Banner","fingerprint":"Fingerprint","cmd_stdout":"STDOUT","cmd_stderr":"STDERR","error":"Erro"}
-        widths  = {"host":160,"ip":140,"port":60,"ok":50,"latency_ms":100,"time_ms":90,"auth_method":120,"banner":240,"fingerprint":240,"cmd_stdout":260,"cmd_stderr":220,"error":260}
-        self.tree = ttk.Treeview(table, columns=cols, show="headings", height=12)
-        for c in cols:
-            self.tree.heading(c, text=headers[c])
-            self.tree.column(c, width=widths[c], anchor="w")
-        self.tree.pack(side="left", expand=True, fill="both")
-        scr2 = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scr2.set); scr2.pack(side="right", fill="y")
+        cols = RESULT_COLUMNS
+        headers = {"host":"Host","ip":"IP","port":"Porta","ok":"OK","latency_ms":"Latência (ms)","time_ms":"Total (ms)","auth_method":"Auth","auth_key":"Chave","allowed_methods":"Métodos","banner":"Banner","fingerprint":"Fingerprint (SHA256)","key_hosts":"Hosts c/ chave","hostkey_status":"known_hosts","cmd_stdout":"STDOUT","cmd_stderr":"STDERR","error":"Erro","timeout_phase":"Fase (timeout)","inherited_from":"Herdado de",
+                   "dns_ms":"DNS (ms)","connect_ms":"Connect (ms)","banner_ms":"Banner (ms)","kex_ms":"KEX (ms)","auth_ms":"Auth (ms)","command_ms":"Comando (ms)"}
+        widths  = {"host":160,"ip":140,"port":60,"ok":50,"latency_ms":100,"time_ms":90,"auth_method":120,"auth_key":200,"allowed_methods":200,"banner":240,"fingerprint":240,"key_hosts":90,"hostkey_status":100,"cmd_stdout":260,"cmd_stderr":220,"error":260,"timeout_phase":110,"inherited_from":160,
+                   **dict.fromkeys(PHASE_COLUMNS, 90)}
+        self.table = VirtualTable(table, cols, headers, widths, rows=self._rows,
+                                  values=lambda row: self.store.values(row), on_sort=self.on_sort)
+        self.table.pack(expand=True, fill="both")
 
         # Status
         status = ttk.Frame(self, padding=(10,4)); status.pack(fill="x")
@@ -383,124 +2964,697 @@ class App(tk.Tk):
                                        filetypes=[("Chaves SSH","*.pem *.key *id_rsa *id_ecdsa *id_ed25519 *id_dsa *id_dss *"), ("Todos","*.*")])
         if p: self.var_key.set(p)
 
+    def _choose_known_hosts(self):
+        p = filedialog.askopenfilename(title="Selecionar known_hosts",
+                                       initialdir=os.path.expanduser("~/.ssh"),
+                                       filetypes=[("known_hosts","known_hosts*"), ("Todos","*.*")])
+        if p: self.var_known_hosts.set(p)
+
     def on_import(self):
         p = filedialog.askopenfilename(title="Importar lista",
                                        filetypes=[("Texto","*.txt *.list *.cfg *.conf"), ("Todos","*.*")])
         if not p: return
+        if os.path.getsize(p) > IMPORT_INLINE_MAX:
+            return self._set_target_file(p)
+        self._set_target_file(None)
         with open(p, "r", encoding="utf-8", errors="ignore") as f:
-            self.txt_hosts.delete("1.0","end")
             self.txt_hosts.insert("1.0", f.read())
 
+    def _set_target_file(self, path):
+        """
+        path: alvos lidos sob demanda do arquivo durante o teste; a caixa de texto fica
+        só com a prévia (somente leitura). None: volta à lista digitada (caixa vazia).
+        """
+        self._target_file, self._target_count = path, None
+        self.txt_hosts.configure(state="normal")
+        self.txt_hosts.delete("1.0","end")
+        if path is None:
+            self.var_source.set(""); self.btn_edit_hosts.grid_remove()
+            return
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            self.txt_hosts.insert("1.0", "".join(islice(f, IMPORT_PREVIEW_LINES)))
+        self.txt_hosts.configure(state="disabled")
+        name = os.path.basename(path)
+        self.var_source.set(f"Arquivo: {name} — contando alvos…")
+        self.btn_edit_hosts.grid()
+
+        def count():
+            n = count_target_file(path)
+            def show():
+                if self._target_file != path: return
+                self._target_count = n
+                if self._status_base and self.scan_progress.total is None: self.scan_progress.total = n
+                self.var_source.set(f"Arquivo: {name} — {n} alvo(s); prévia das primeiras {IMPORT_PREVIEW_LINES} linhas")
+            self.after(0, show)
+        threading.Thread(target=count, daemon=True).start()
+
     def on_export(self):
         p = filedialog.asksaveasfilename(title="Exportar CSV", defaultextension=".csv", filetypes=[("CSV","*.csv")])
         if not p: return
-        rows = [self.tree.item(i,"values") for i in self.tree.get_children("")]
-        cols = ("host","ip","port","ok","latency_ms","time_ms","auth_method","banner","fingerprint","cmd_stdout","cmd_stderr","error")
+        self._refresh_key_counts()
+        rows = (self.store[row].values() for row in self._rows())
         with open(p, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f); w.writerow(cols); w.writerows(rows)
+            w = csv.writer(f); w.writerow(RESULT_COLUMNS); w.writerows(rows)
         messagebox.showinfo("Exportado", f"Salvo em:\n{p}")
 
+    def on_export_keys(self):
+        p = filedialog.asksaveasfilename(title="Exportar host keys", defaultextension=".txt", filetypes=[("Texto","*.txt")])
+        if not p: return
+        with open(p, "w", encoding="utf-8") as f:
+            n = HOST_KEYS.export(f)
+        messagebox.showinfo("Exportado", f"{n} host key(s) salvas em:\n{p}")
+
     def on_test(self):
-        raw = self.txt_hosts.get("1.0","end").strip()
-        if not raw:
-            messagebox.showwarning("Aviso","Informe ao menos um host.")
-            return
-        default_port = self.var_port.get()
-        targets = []
-        for line in raw.splitlines():
-            s = line.strip()
-            if not s or s.startswith("#"): continue
-            if ":" in s:
-                h, p = s.rsplit(":",1)
-                try: targets.append((h.strip(), int(p)))
-                except: targets.append((h.strip(), default_port))
-            else:
-                targets.append((s, default_port))
+        if self._target_file:
+            targets = iter_target_file(self._target_file, self.var_port.get())
+            total, desc = self._target_count, "alvos do arquivo"
+        else:
+            raw = self.txt_hosts.get("1.0","end").strip()
+            if not raw:
+                messagebox.showwarning("Aviso","Informe ao menos um host.")
+                return
+            lines = raw.splitlines()
+            targets = parse_targets(lines, self.var_port.get())
+            total = count_targets(lines, self.var_port.get())
+            desc = f"até {total} host(s)"
 
         # Limpa resultados
-        for iid in self.tree.get_children(""): self.tree.delete(iid)
+        self._partial_rows.clear()
+        self.store = ResultStore()
+        self.findex = FilterIndex(self.findex.needle)
+        self.table.selected = None
+        self._resort()   # mantém as colunas escolhidas; as linhas entram ordenadas
+        self.stats = PhaseStats()
+        self.scan_progress = ScanProgress(total)
+        self.ui_lag.reset()
+        self.var_pause.set("Pausar")
+        HOST_KEYS.clear()
+        close_agent()   # identidades do agente relidas a cada execução
 
-        self.stop_flag.clear()
-        self.var_status.set(f"Testando {len(targets)} host(s)…")
+        self._status_base = f"Testando {desc}…"
+        self.var_status.set(self._status_base)
         self.progress.start(100)
 
-        uname = self.var_username.get().strip() or None
-        pwd   = self.var_password.get() or ""
-        key   = self.var_key.get().strip() or None
-        pph   = self.var_passphrase.get() or None
-        acc   = self.var_accept_unknown.get()
-        cmd   = self.var_cmd.get().strip() or ""
-        kbi   = self.var_kbi.get()
-
+        opts = ScanOptions(
+            username=self.var_username.get().strip(),
+            password=self.var_password.get() or "",
+            pkey_path=self.var_key.get().strip() or None,
+            passphrase=self.var_passphrase.get() or None,
+            accept_unknown_hostkey=self.var_accept_unknown.get(),
+            verify_command=self.var_cmd.get().strip() or "",
+            kbi_enable=self.var_kbi.get(),
+            use_agent=self.var_agent.get(),
+            mode=self.var_mode.get(), probe_methods=self.var_probe.get(),
+            algo_profile=self.var_algos.get(),
+            known_hosts=self.var_known_hosts.get().strip() or None, tofu=self.var_tofu.get(),
+            known_hosts_sweep=self.var_kh_sweep.get(), dedup=self.var_dedup.get(),
+            host_timeout=max(1.0, float(self.var_host_timeout.get())),
+        )
         maxw  = max(1, min(200, int(self.var_workers.get())))
-        self.executor = ThreadPoolExecutor(max_workers=maxw)
-        self.futures.clear()
+        procs = max(1, int(self.var_procs.get()))
+        self.engine = make_engine(self.var_engine.get(), opts, maxw, processes=procs,
+                                  prefilter=self.var_prefilter.get(), adaptive=self.var_adaptive.get(),
+                                  adapt_min=max(1, int(self.var_adapt_min.get())),
+                                  adapt_max=max(1, int(self.var_adapt_max.get())))
 
-        def submit_all():
-            for host, port in targets:
-                if self.stop_flag.is_set(): break
-                fut = self.executor.submit(
-                    test_ssh_host, host, port, uname, pwd, key, pph, acc, cmd, kbi
-                )
-                fut.add_done_callback(lambda f: self.q.put(f.result()))
-                self.futures.append(fut)
-            threading.Thread(target=self._wait_all, daemon=True).start()
-
-        threading.Thread(target=submit_all, daemon=True).start()
-
-    def _wait_all(self):
-        for f in self.futures:
-            try: f.result()
-            except Exception: pass
-        if self.executor:
-            self.executor.shutdown(wait=False); self.executor = None
-        self.futures.clear(); self.stop_flag.clear()
-        self.after(0, self._finish)
+        def run(engine=self.engine):
+            engine.run(targets, self.q.put)
+            self.after(0, self._finish)
+
+        threading.Thread(target=run, daemon=True).start()
 
     def _finish(self):
-        self.progress.stop(); self.var_status.set("Concluído")
+        self._status_base = None
+        self.progress.stop()
+        self._refresh_key_counts()
+        if self._stop_t0 is not None:
+            ms = int((time.perf_counter() - self._stop_t0) * 1000)
+            self._stop_t0 = None
+            self.var_status.set(f"Cancelado em {ms} ms — {len(self.store)} resultado(s) mantidos")
+            return
+        summary = self.stats.summary()
+        self.var_status.set(f"Concluído — p50/p90 (ms): {summary}" if summary else "Concluído")
 
     def on_stop(self):
-        self.stop_flag.set(); self.var_status.set("Cancelando…")
-        if self.executor:
-            self.executor.shutdown(wait=False); self.executor=None
-        self.progress.stop()
+        if not (self.engine and self._status_base): return   # nada em andamento
+        self._status_base = None
+        self._stop_t0 = time.perf_counter()
+        self.var_pause.set("Pausar")
+        self.var_status.set("Cancelando…")
+        self.engine.stop()
+
+    def on_pause(self):
+        """Pausar: nenhum alvo novo, os em voo terminam; Retomar segue do ponto exato da lista."""
+        if not (self.engine and self._status_base): return
+        if self.engine.paused:
+            self.engine.resume(); self.scan_progress.resume()
+            self.var_pause.set("Pausar")
+        else:
+            self.engine.pause(); self.scan_progress.pause()
+            self.var_pause.set("Retomar")
+        self._update_window_status()
 
     def _poll_queue(self):
+        """
+        Aplica os resultados em lotes de no máximo FRAME_BUDGET_S; o que sobrar fica na fila
+        para o próximo tick, e entre um lote e outro o Tk trata teclado, mouse e redesenho.
+        """
+        t0 = self.ui_lag.begin()
+        end, clock = t0 + FRAME_BUDGET_S, time.perf_counter
+        get, insert, n = self.q.get_nowait, self._insert_row, 0
         try:
-            while True:
-                r = self.q.get_nowait()
-                self._insert_row(r)
+            while clock() < end:
+                insert(get()); n += 1
         except queue.Empty:
             pass
         finally:
-            self.after(120, self._poll_queue)
+            if self._pending: self._place_pending()
+            if n: self.table.refresh()
+            if t0 - self._status_t >= STATUS_EVERY_S:
+                self._status_t = t0
+                self._update_window_status()
+            delay = POLL_BUSY_MS if self.q.qsize() else POLL_IDLE_MS
+            self.ui_lag.end(delay)
+            self.after(delay, self._poll_queue)
+
+    def _update_window_status(self):
+        if not (self.engine and self._status_base): return
+        win, prog = self.engine.window_info(), self.scan_progress
+        if self.engine.paused:
+            eta = prog.eta()
+            self.var_status.set(f"Pausado — {prog.done}{f'/{prog.total}' if prog.total else ''} concluídos"
+                                + (f", {win[1]} em voo terminando" if win and win[1] else "")
+                                + (f"; ETA ao retomar {fmt_duration(eta)}" if eta is not None else ""))
+            return
+        self.var_status.set(f"{self._status_base}  {prog.text()}" + (f"  janela {win[0]} • em voo {win[1]}" if win else "")
+                            + (f"  {self.ui_lag.text()}" if self.ui_lag.samples else ""))
+
+    def _refresh_key_counts(self):
+        """key_hosts é gravado quando a linha chega; atualiza com o total atual de cada chave."""
+        changed = self.store.recount_keys(HOST_KEYS.counts)
+        for row in changed:
+            self.findex.update(row, self.store.values(row))
+        if changed and self.sort: self._resort()
+        else: self.table.refresh()
 
     def _insert_row(self, r: dict):
-        vals = (
-            r.get("host",""), r.get("ip",""), r.get("port",""),
-            "✔" if r.get("ok") else "✖",
-            r.get("latency_ms",""), r.get("time_ms",""),
-            r.get("auth_method",""), r.get("banner",""), r.get("fingerprint",""),
-            (r.get("cmd_stdout","") or "")[:300],
-            (r.get("cmd_stderr","") or "")[:200],
-            r.get("error",""),
-        )
-        self.tree.insert("", "end", values=vals)
-        self._apply_filter()
+        self.stats.add(r)
+        self.scan_progress.add(r)
+        if not r.get("partial"): HOST_KEYS.note(r)
+        key = (r.get("host",""), r.get("port",""))
+        if r.get("partial"):
+            row = self.store.append(r)
+            self.findex.add(self.store.values(row))
+            self._partial_rows.setdefault(key, []).append(row)
+        elif self._partial_rows.get(key):
+            # resultado final substitui a linha parcial (banner) do mesmo host
+            row = self._partial_rows[key].pop(0)
+            if not self._partial_rows[key]: del self._partial_rows[key]
+            if self.sort: self._unplace(row)   # antes de mudar as chaves
+            self.store.update(row, r)
+            self.findex.update(row, self.store.values(row))
+        else:
+            row = self.store.append(r)
+            self.findex.add(self.store.values(row))
+        if self.sort: self._pending.add(row)
+
+    def _schedule_filter(self):
+        if self._filter_job: self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DEBOUNCE_MS, self._apply_filter)
 
     def _apply_filter(self):
-        needle = self.var_filter.get().lower().strip()
-        for iid in self.tree.get_children(""):
-            text = " ".join(str(v) for v in self.tree.item(iid,"values")).lower()
-            if needle and needle not in text:
-                self.tree.detach(iid)
+        self._filter_job = None
+        self.findex.set_needle(self.var_filter.get().lower().strip())
+        if self.sort: self._rebuild_view()
+        self.table.refresh()
+
+    # ----- Ordenação -----
+    def _rows(self):
+        if not self.sort: return self.findex.shown
+        return self.order if self.view is None else self.view
+
+    def on_sort(self, col, add):
+        """
+        Clique: ordena pela coluna (▲, de novo ▼, de novo volta à ordem de chegada).
+        Shift+clique: acrescenta a coluna como critério seguinte, ou inverte a que já está.
+        """
+        if add and self.sort:
+            if col in dict(self.sort): self.sort = [(c, not d if c == col else d) for c, d in self.sort]
+            else: self.sort.append((col, False))
+        elif len(self.sort) == 1 and self.sort[0][0] == col:
+            self.sort = [] if self.sort[0][1] else [(col, True)]
+        else:
+            self.sort = [(col, False)]
+        self._resort()
+
+    def _resort(self):
+        """Ordem completa: um sort estável por coluna, da última à principal, com as chaves do store."""
+        self._pending.clear()
+        if self.sort:
+            order = list(range(len(self.store)))
+            for col, desc in reversed(self.sort):
+                order.sort(key=self.store.sort_keys(col).__getitem__, reverse=desc)
+            self.order = array("I", order)
+            keys = [(self.store.sort_keys(c), d) for c, d in self.sort]
+            # chave composta para a busca binária; a linha desempata como nos sorts estáveis
+            self._sort_key = lambda row: tuple(Descending(k[row]) if d else k[row] for k, d in keys) + (row,)
+            self._rebuild_view()
+        else:
+            self.order = self.view = self._sort_key = None
+        self.table.mark_sort(self.sort)
+        self.table.refresh()
+
+    def _rebuild_view(self):
+        vis = self.findex.vis
+        self.view = array("I", (r for r in self.order if vis[r])) if self.findex.needle else None
+
+    def _unplace(self, row):
+        """Tira da ordem uma linha que vai mudar (ainda com as chaves antigas)."""
+        if row in self._pending: return
+        key = self._sort_key
+        del self.order[sorted_index(self.order, row, key)]
+        if self.view is not None and self.findex.vis[row]:
+            del self.view[sorted_index(self.view, row, key)]
+
+    def _place_pending(self):
+        """Linhas do lote entram na ordem por busca binária (uma cópia do array por lote)."""
+        for c, _ in self.sort: self.store.sort_keys(c)   # estende as chaves até a última linha
+        key = self._sort_key
+        rows = sorted(self._pending, key=key)
+        self._pending.clear()
+        self.order = merge_sorted(self.order, rows, key)
+        if self.view is not None:
+            vis = self.findex.vis
+            self.view = merge_sorted(self.view, [r for r in rows if vis[r]], key)
+
+# ---------- Headless ----------
+class CsvSink:
+    """Destino dos resultados no modo headless: grava cada resultado como linha CSV (thread-safe)."""
+    def __init__(self, f):
+        self.w = csv.writer(f)
+        self.w.writerow(RESULT_COLUMNS)
+        self.lock = threading.Lock()
+        self.total = self.ok = self.inherited = 0
+        self.stats = PhaseStats()
+        self.progress = ScanProgress()
+        self.closed = False
+
+    def close(self):
+        """Depois disto, resultados atrasados (Ctrl+C) não são mais gravados."""
+        with self.lock: self.closed = True
+
+    def __call__(self, r: dict):
+        if r.get("partial"): return   # banner parcial: a linha final vem depois
+        self.stats.add(r)
+        HOST_KEYS.note(r)   # key_hosts no CSV: hosts com a chave até esta linha
+        with self.lock:
+            if self.closed: return
+            self.progress.add(r)   # ScanProgress não tem trava própria
+            self.w.writerow(result_to_row(r))
+            self.total += 1
+            self.ok += bool(r.get("ok"))
+            self.inherited += bool(r.get("inherited_from"))
+
+def run_headless(args):
+    from_file = args.hosts_file != "-"
+    targets = iter_target_file(args.hosts_file, args.port) if from_file else parse_targets(sys.stdin, args.port)
+    opts = ScanOptions(
+        username=args.username, password=args.password,
+        pkey_path=args.key, passphrase=args.passphrase,
+        accept_unknown_hostkey=not args.reject_unknown,
+        verify_command=args.command, kbi_enable=not args.no_kbi, use_agent=args.agent,
+        mode=args.mode, probe_methods=args.probe_methods, algo_profile=args.algorithms,
+        known_hosts=args.known_hosts, tofu=args.tofu, known_hosts_sweep=args.known_hosts_sweep, dedup=args.dedup,
+        phase_budgets=dict(PHASE_BUDGETS, **args.phase_timeout), host_timeout=args.host_timeout,
+    )
+    engine = make_engine(args.engine, opts, args.workers, processes=args.processes, prefilter=args.prefilter,
+                         adaptive=args.adaptive, adapt_min=args.adapt_min, adapt_max=args.adapt_max)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    sink = CsvSink(out)
+    if from_file:   # total para o ETA, contado em paralelo ao teste
+        threading.Thread(target=lambda: setattr(sink.progress, "total", count_target_file(args.hosts_file)),
+                         daemon=True).start()
+    pause_hint = ""
+    if hasattr(signal, "SIGUSR1"):
+        def toggle_pause(*_):
+            prog = sink.progress
+            if engine.paused:
+                engine.resume(); prog.resume()
+                print(f"Retomado — {prog.text()}", file=sys.stderr)
             else:
-                self.tree.reattach(iid, "", "end")
+                engine.pause(); prog.pause()
+                eta = prog.eta()
+                print(f"Pausado — {prog.done}{f'/{prog.total}' if prog.total else ''} concluídos"
+                      + (f"; ETA ao retomar {fmt_duration(eta)}" if eta is not None else "")
+                      + f" (kill -USR1 {os.getpid()} retoma)", file=sys.stderr)
+        signal.signal(signal.SIGUSR1, toggle_pause)
+        pause_hint = f" (kill -USR1 {os.getpid()} pausa/retoma)"
+    print(f"Testando alvos [{engine.name}]…{pause_hint}", file=sys.stderr)
+    status = "Concluído"
+
+    def interrupt(*_):
+        nonlocal status
+        if status == "Cancelado": raise KeyboardInterrupt   # segundo Ctrl+C: sai sem esperar
+        status = "Cancelado"
+        print("Cancelando… (Ctrl+C de novo sai sem esperar)", file=sys.stderr)
+        # fora do handler: stop() pega travas que o run() interrompido pode estar segurando
+        threading.Thread(target=engine.stop, daemon=True).start()
+    # Ctrl+C só pede o Parar: run() termina (linhas "Cancelado", known_hosts do TOFU gravado,
+    # shards recolhidos) antes de o CSV ser fechado
+    prev_sigint = signal.signal(signal.SIGINT, interrupt)
+    try:
+        engine.run(targets, sink)
+    finally:
+        signal.signal(signal.SIGINT, prev_sigint)
+        sink.close()
+        if out is not sys.stdout: out.close()
+    inherited = f", {sink.inherited} herdado(s)" if sink.inherited else ""
+    print(f"{status}: {sink.total} host(s), {sink.ok} ok{inherited}", file=sys.stderr)
+    shared = HOST_KEYS.shared()
+    if shared:
+        print(f"Host keys compartilhadas: {len(shared)} chave(s) em {sum(n for _, n in shared)} host(s)", file=sys.stderr)
+        for fp, n in shared[:5]: print(f"  {n:>7}  {fp}", file=sys.stderr)
+    if args.host_keys_out:
+        with open(args.host_keys_out, "w", encoding="utf-8") as f:
+            n = HOST_KEYS.export(f)
+        print(f"Host keys: {n} gravada(s) em {args.host_keys_out}", file=sys.stderr)
+    if sink.stats.percentiles():
+        print(sink.stats.table(), file=sys.stderr)
+
+# ---------- Benchmark (servidor paramiko local) ----------
+class _BenchServer(paramiko.ServerInterface):
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+def _bench_host_keys():
+    """RSA, ECDSA e Ed25519 (o paramiko não gera Ed25519; vem do cryptography)."""
+    keys = [paramiko.RSAKey.generate(2048), paramiko.ECDSAKey.generate()]
+    try:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+        pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.OpenSSH, serialization.NoEncryption())
+        keys.append(paramiko.Ed25519Key(file_obj=io.StringIO(pem.decode())))
+    except Exception:
+        pass
+    return keys
+
+def _bench_server_proc(port_q, port=0):
+    keys = _bench_host_keys()
+    paramiko.Transport.load_server_moduli()   # group-exchange precisa de /etc/ssh/moduli
+    lsock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    lsock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):   # vários processos servidores na mesma porta
+        lsock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    lsock.bind(("127.0.0.1", port))
+    lsock.listen(4096)
+    port_q.put(lsock.getsockname()[1])
+    while True:
+        conn, _ = lsock.accept()
+        tr = paramiko.Transport(conn)
+        for key in keys: tr.add_server_key(key)
+        try:
+            tr.start_server(event=threading.Event(), server=_BenchServer())
+        except Exception:
+            tr.close()
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def _bench_engine(name, n, workers, target, res_q, processes=1):
+    engine = make_engine(name, ScanOptions(username="bench", password="bench"), workers, processes=processes)
+    ok, peak, done = [0], [threading.active_count()], threading.Event()
+
+    def sample():
+        while not done.wait(0.02):
+            peak[0] = max(peak[0], threading.active_count())
+    threading.Thread(target=sample, daemon=True).start()
+
+    def emit(r):
+        ok[0] += bool(r.get("ok"))
+
+    t0 = time.perf_counter()
+    engine.run([target] * n, emit)
+    secs = time.perf_counter() - t0
+    done.set()
+    res_q.put({"engine": name, "hosts": n, "ok": ok[0], "secs": secs,
+               "hps": n / secs if secs else 0.0, "rss_mb": _peak_rss_mb(), "threads": peak[0]})
+
+def _start_bench_servers(ctx, n):
+    """Sobe n processos servidores na mesma porta (SO_REUSEPORT); devolve (alvo, processos)."""
+    if not hasattr(socket, "SO_REUSEPORT"): n = 1
+    port_q, procs, port = ctx.Queue(), [], 0
+    for _ in range(max(1, n)):
+        p = ctx.Process(target=_bench_server_proc, args=(port_q, port), daemon=True)
+        p.start(); procs.append(p)
+        port = port_q.get(timeout=60)
+    return ("127.0.0.1", port), procs
+
+def _bench_once(ctx, name, args, target, processes=1):
+    # processo novo por medição: RSS de pico e contagem de threads não se misturam
+    res_q = ctx.Queue()
+    p = ctx.Process(target=_bench_engine, args=(name, args.bench_hosts, args.workers, target, res_q, processes))
+    p.start()
+    r = res_q.get()
+    p.join()
+    return r
+
+def _handshake_cost(target, n, kex=None, cipher=None, key_type=None, profile=None):
+    """
+    (CPU ms, parede ms) médios por handshake (TCP + KEX, sem auth), com um único algoritmo
+    de cada tipo ou um perfil inteiro. CPU = process_time do processo cliente, que inclui a
+    thread do Transport; o servidor roda em outro processo. None se a negociação falhar.
+    """
+    cpu = wall = 0.0
+    for _ in range(n):
+        sock = socket.create_connection(target, timeout=READ_TIMEOUT)
+        c0, w0 = time.process_time(), time.perf_counter()
+        tr = paramiko.Transport(sock)
+        try:
+            apply_algo_profile(tr, profile)
+            so = tr.get_security_options()
+            if kex: so.kex = (kex,)
+            if cipher: so.ciphers = (cipher,)
+            if key_type: so.key_types = (key_type,)
+            kex_done = threading.Event()
+            tr.start_client(event=kex_done)
+            if not kex_done.wait(READ_TIMEOUT) or not tr.is_active(): return None
+            cpu += time.process_time() - c0
+            wall += time.perf_counter() - w0
+        except Exception:
+            return None
+        finally:
+            tr.close()
+    return cpu * 1000 / n, wall * 1000 / n
+
+def run_algo_benchmark(target, n):
+    """
+    Custo de CPU do cliente por handshake: todas as combinações KEX × host key (com a
+    cifra preferida do perfil "fastest") e cada cifra com o KEX/host key mais rápidos;
+    no fim, o custo de cada perfil de ALGO_PROFILES.
+    """
+    tr = paramiko.Transport(socket.socket())   # só para consultar as tabelas de algoritmos
+    kexes = supported_algorithms(tr, "kex")
+    ciphers = supported_algorithms(tr, "ciphers")
+    key_types = [k for k in ("ssh-ed25519", "ecdsa-sha2-nistp256", "rsa-sha2-256", "rsa-sha2-512")
+                 if k in supported_algorithms(tr, "key_types")]
+    tr.close()
+    cipher0 = next(c for c in ALGO_PROFILES["fastest"]["ciphers"] + ciphers if c in ciphers)
+    rows = []
+    for kex in kexes:
+        for kt in key_types:
+            rows.append((kex, kt, cipher0, _handshake_cost(target, n, kex, cipher0, kt)))
+    ok = sorted((r for r in rows if r[3]), key=lambda r: r[3][0])
+    if ok:
+        best_kex, best_kt = ok[0][0], ok[0][1]
+        rows += [(best_kex, best_kt, c, _handshake_cost(target, n, best_kex, c, best_kt))
+                 for c in ciphers if c != cipher0]
+    print(f"{'kex':<38}{'host key':<22}{'cifra':<26}{'CPU ms':>8}{'parede ms':>11}")
+    for kex, kt, c, cost in sorted(rows, key=lambda r: (r[3] is None, r[3] and r[3][0])):
+        cols = f"{cost[0]:>8.1f}{cost[1]:>11.1f}" if cost else f"{'falhou':>8}{'':>11}"
+        print(f"{kex:<38}{kt:<22}{c:<26}{cols}")
+    print()
+    for name in ALGO_PROFILES:
+        cost = _handshake_cost(target, n, profile=name)
+        print(f"perfil {name:<10}" + (f"{cost[0]:>8.1f} ms CPU {cost[1]:>8.1f} ms parede" if cost else "falhou"))
+
+def _bench_ui_result(i):
+    """Resultado sintético variado (ok, falha de auth, timeout) para o benchmark da GUI."""
+    r = new_result(f"host-{i}.bench", 22, socket.inet_ntoa(struct.pack("!I", 0x0A000000 + i)))
+    # uma host key por servidor, como num scan real: base64 de 43 caracteres
+    fp = "SHA256:" + base64.b64encode(hashlib.sha256(i.to_bytes(4, "big")).digest()).decode().rstrip("=")
+    r.update(banner="SSH-2.0-OpenSSH_9.6", fingerprint=fp, time_ms=i % 900,
+             latency_ms=i % 300, connect_ms=i % 300, kex_ms=i % 50)
+    if i % 3 == 0: r.update(ok=True, auth_method="password", cmd_stdout=f"host-{i}")
+    elif i % 3 == 1: r.update(error="Authentication failed.", allowed_methods="publickey,password")
+    else: r.update(error=ERR_TIMEOUT, timeout_phase="connect", banner="")
+    return r
+
+def run_ui_benchmark(rate, seconds):
+    """
+    Alimenta a fila da GUI com `rate` resultados/s sintéticos por `seconds` s e mede o atraso
+    do loop do Tk (UiLag) e quantos resultados ficaram para trás na fila.
+    """
+    app = App()
+    stop, fed, rss0 = threading.Event(), [0], [None]
+
+    def feed():
+        t0 = time.perf_counter()
+        while not stop.is_set():
+            due = int((time.perf_counter() - t0) * rate)
+            while fed[0] < due:
+                app.q.put(_bench_ui_result(fed[0])); fed[0] += 1
+            time.sleep(0.005)
+
+    def start():
+        app.ui_lag.reset(); rss0[0] = _peak_rss_mb()
+        threading.Thread(target=feed, daemon=True).start()
+        app.after(int(seconds * 1000), done)
+
+    def done():
+        stop.set()
+        lag = app.ui_lag
+        print(f"GUI: {fed[0]} resultados em {seconds:g}s ({rate}/s), {app.q.qsize()} ainda na fila")
+        print(f"atraso do loop (ms): p50 {lag.percentile(50):.1f}  p99 {lag.percentile(99):.1f}  "
+              f"máx {lag.worst:.1f}  ({len(lag.samples)} ticks)")
+        rss, rows = _peak_rss_mb(), len(app.store)
+        if rss0[0] is not None and rows:
+            print(f"memória: +{rss - rss0[0]:.1f} MB ({(rss - rss0[0]) * 100_000 / rows:.1f} MB por 100k resultados)")
+        app.destroy()
+
+    app.after(2000, start)   # depois do splash
+    app.mainloop()
+
+def run_store_benchmark(n):
+    """RSS e custo por linha da tabela da GUI (ResultStore + FilterIndex) com n resultados sintéticos; sem Tk."""
+    rss0, t0 = _peak_rss_mb(), time.perf_counter()
+    store, findex = ResultStore(), FilterIndex()
+    for i in range(n):
+        findex.add(store.values(store.append(_bench_ui_result(i))))
+    secs, rss = time.perf_counter() - t0, _peak_rss_mb()
+    print(f"{n} resultados em {secs:.1f}s ({secs / n * 1e6:.1f} µs cada, com a geração)")
+    if rss0 is not None:
+        print(f"RSS: +{rss - rss0:.1f} MB ({(rss - rss0) * 100_000 / n:.1f} MB por 100k resultados)")
+    t0 = time.perf_counter(); findex.set_needle("authentication")
+    print(f"filtro em {n} linhas: {(time.perf_counter() - t0) * 1000:.0f} ms, {len(findex.shown)} visíveis")
+
+def run_benchmark(args):
+    if args.bench_store:
+        return run_store_benchmark(max(1, args.bench_store))
+    if args.bench_ui:
+        return run_ui_benchmark(max(1, args.bench_ui_rate), max(1.0, args.bench_ui_seconds))
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    servers = []
+    if args.bench_target:
+        target = next(parse_targets([args.bench_target], args.port))
+    else:
+        target, servers = _start_bench_servers(ctx, args.bench_servers)
+    if args.bench_algos:
+        print(f"Custo por handshake em {target[0]}:{target[1]} (média de {args.bench_handshakes})")
+        try:
+            return run_algo_benchmark(target, max(1, args.bench_handshakes))
+        finally:
+            for p in servers: p.terminate()
+    print(f"Benchmark: {args.bench_hosts} conexões em {target[0]}:{target[1]}, workers={args.workers}")
+    try:
+        if args.bench_scaling:
+            name = ThreadScanEngine.name if args.engine == "all" else args.engine
+            n = args.processes if args.processes > 1 else (os.cpu_count() or 1)
+            print(f"{'processos':<10}{'hosts/s':>10}{'ok':>8}{'tempo (s)':>11}{'speedup':>9}")
+            base = None
+            for procs in range(1, n + 1):
+                r = _bench_once(ctx, name, args, target, procs)
+                base = base or r["hps"]
+                print(f"{procs:<10}{r['hps']:>10.1f}{r['ok']:>8}{r['secs']:>11.2f}{r['hps'] / base:>8.2f}x")
+            return
+        names = list(ENGINES) if args.engine == "all" else [args.engine]
+        print(f"{'motor':<10}{'hosts/s':>10}{'ok':>8}{'tempo (s)':>11}{'RSS pico (MB)':>15}{'threads':>9}")
+        for name in names:
+            r = _bench_once(ctx, name, args, target, args.processes)
+            rss = f"{r['rss_mb']:.1f}" if r["rss_mb"] is not None else "n/d"
+            print(f"{r['engine']:<10}{r['hps']:>10.1f}{r['ok']:>8}{r['secs']:>11.2f}{rss:>15}{r['threads']:>9}")
+    finally:
+        for p in servers: p.terminate()
+
+def _parse_budgets(text):
+    budgets = {}
+    for item in filter(None, text.split(",")):
+        phase, _, secs = item.partition("=")
+        if phase.strip() not in PHASES:
+            raise argparse.ArgumentTypeError(f"fase desconhecida: {phase}")
+        budgets[phase.strip()] = float(secs)
+    return budgets
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=APP_TITLE)
+    ap.add_argument("--headless", action="store_true", help="executa sem GUI, resultados em CSV")
+    ap.add_argument("--bench", action="store_true", help="benchmark dos motores (hosts/s, RSS, threads)")
+    ap.add_argument("-f", "--hosts-file", default="-", help="lista de hosts ('-' = stdin)")
+    ap.add_argument("-o", "--output", help="arquivo CSV (padrão: stdout)")
+    ap.add_argument("--host-keys-out", help="grava as host keys completas vistas (tipo blob fingerprint hosts)")
+    ap.add_argument("-u", "--username", default="")
+    ap.add_argument("-p", "--password", default=os.environ.get("SSH_TESTER_PASSWORD", ""),
+                    help="senha (padrão: $SSH_TESTER_PASSWORD)")
+    ap.add_argument("-k", "--key", help="chave privada")
+    ap.add_argument("--passphrase")
+    ap.add_argument("-c", "--command", default="", help="comando pós-login")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help="porta padrão")
+    ap.add_argument("-w", "--workers", type=int, default=MAX_WORKERS_DEFAULT, help="threads por processo")
+    ap.add_argument("--processes", type=int, default=1, help="processos (shards); 1 = sem multiprocessing")
+    ap.add_argument("--engine", default=ThreadScanEngine.name, choices=list(ENGINES) + ["all"])
+    ap.add_argument("--prefilter", action="store_true", help="pré-filtro TCP+banner antes do KEX/auth")
+    ap.add_argument("--adaptive", action="store_true", help="concorrência adaptativa (AIMD/latência)")
+    ap.add_argument("--adapt-min", type=int, default=ADAPT_MIN_DEFAULT, help="janela mínima")
+    ap.add_argument("--adapt-max", type=int, default=ADAPT_MAX_DEFAULT, help="janela máxima")
+    ap.add_argument("--host-timeout", type=float, default=HOST_TIMEOUT, help="teto total por host (s)")
+    ap.add_argument("--phase-timeout", type=_parse_budgets, default={}, metavar="FASE=S[,…]",
+                    help="prazos por fase, ex.: dns=3,auth=10 (fases: " + ", ".join(PHASES) + ")")
+    ap.add_argument("--no-kbi", action="store_true", help="não tentar keyboard-interactive")
+    ap.add_argument("--agent", action="store_true", help="tentar as chaves do ssh-agent (SSH_AUTH_SOCK)")
+    ap.add_argument("--mode", choices=SCAN_MODES, default="full",
+                    help='"methods": só a sonda auth "none" (métodos oferecidos), sem credenciais')
+    ap.add_argument("--probe-methods", action="store_true",
+                    help='sondar os métodos com auth "none" e pular os que o servidor não oferece')
+    ap.add_argument("--algorithms", choices=list(ALGO_PROFILES), default="default",
+                    help='perfil de KEX/cifra/host key ("fastest": curve25519 + AES-GCM primeiro)')
+    ap.add_argument("--reject-unknown", action="store_true", help="recusar host key desconhecida")
+    ap.add_argument("--known-hosts", metavar="ARQUIVO", help="verificar host keys contra este known_hosts")
+    ap.add_argument("--tofu", action="store_true", help="gravar no known_hosts as chaves desconhecidas (fim da execução)")
+    ap.add_argument("--known-hosts-sweep", action="store_true",
+                    help='nomes hasheados (|1|) sem linha da chave: um HMAC por linha para separar '
+                         'mismatch de unknown (sem isto: "unverified", fora do TOFU)')
+    ap.add_argument("--dedup", choices=list(DEDUP_MODES), default="off",
+                    help="um teste por servidor: addr = mesmo endereço+porta; key = também mesma host key (junta clones)")
+    ap.add_argument("--bench-hosts", type=int, default=500, help="conexões no benchmark")
+    ap.add_argument("--bench-target", help="host:porta real para o benchmark (padrão: servidor local)")
+    ap.add_argument("--bench-servers", type=int, default=1, help="processos do servidor local de benchmark")
+    ap.add_argument("--bench-scaling", action="store_true", help="hosts/s com 1..N processos (N = --processes ou núcleos)")
+    ap.add_argument("--bench-algos", action="store_true", help="CPU do cliente por handshake para cada kex/cifra/host key")
+    ap.add_argument("--bench-handshakes", type=int, default=5, help="handshakes por combinação em --bench-algos")
+    ap.add_argument("--bench-ui", action="store_true", help="atraso do loop da GUI recebendo resultados sintéticos")
+    ap.add_argument("--bench-ui-rate", type=int, default=5000, help="resultados/s em --bench-ui")
+    ap.add_argument("--bench-ui-seconds", type=float, default=10.0, help="duração de --bench-ui")
+    ap.add_argument("--bench-store", type=int, metavar="N", help="RSS da tabela da GUI com N resultados sintéticos (sem display)")
+    args = ap.parse_args(argv)
 
-def main():
+    if args.bench:
+        return run_benchmark(args)
+    if args.headless:
+        if args.engine == "all": ap.error("--engine all só vale com --bench")
+        return run_headless(args)
     app = App()
     app.mainloop()
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
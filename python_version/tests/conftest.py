@@ -0,0 +1,40 @@
+import multiprocessing as mp, os, socket, sys, threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ssh_tester_python3 as m
+
+
+class Tarpit(int):
+    """Porta do tarpit; .conns tem as conexões aceitas."""
+
+
+@pytest.fixture
+def tarpit():
+    """Porta local que aceita conexões e nunca responde (nem banner)."""
+    lsock = socket.socket()
+    lsock.bind(("127.0.0.1", 0))
+    lsock.listen(1024)
+    conns, closed = [], threading.Event()
+
+    def serve():
+        while not closed.is_set():
+            try: conns.append(lsock.accept()[0])
+            except OSError: return
+    threading.Thread(target=serve, daemon=True).start()
+    port = Tarpit(lsock.getsockname()[1])
+    port.conns = conns
+    yield port
+    closed.set()
+    lsock.close()
+    for c in conns: c.close()
+
+
+@pytest.fixture(scope="session")
+def ssh_server():
+    """Servidor paramiko do --bench (aceita qualquer senha): (host, porta)."""
+    addr, procs = m._start_bench_servers(mp.get_context("spawn"), 1)
+    yield addr
+    for p in procs: p.terminate()
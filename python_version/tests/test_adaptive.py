@@ -0,0 +1,68 @@
+import random
+from collections import deque
+
+import pytest
+
+import ssh_tester_python3 as m
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(m.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def simulate(clock, rtt, n=20000, capacity=None, seed=1):
+    """Janela sobre uma frota simulada; rtt(ip) dá o connect do host sem fila."""
+    rnd = random.Random(seed)
+    c = m.AdaptiveConcurrency(4, 500)
+    flying, limits = deque(), []
+    for i in range(n):
+        while c.try_acquire():
+            flying.append(f"10.0.{rnd.randrange(200)}.{rnd.randrange(1, 255)}")
+        ip = flying.popleft()
+        ms = rtt(ip) * rnd.uniform(0.9, 1.1)
+        if capacity and len(flying) > capacity:   # fila no gargalo cresce com o excesso
+            ms *= 1 + (len(flying) - capacity) / 10
+        clock[0] += 0.005
+        c.release({"ip": ip, "connect_ms": ms})
+        limits.append(c.limit)
+    return limits
+
+
+def subnet_rtt(pick):
+    table = {}
+    return lambda ip: table.setdefault(ip.rpartition(".")[0], pick(len(table)))
+
+
+def test_healthy_mixed_lan_wan_opens_window(clock):
+    rnd = random.Random(2)
+    limits = simulate(clock, subnet_rtt(lambda i: 0.5 if i % 2 else rnd.uniform(30, 250)))
+    assert limits[-1] == 500
+
+
+def test_healthy_uniform_wan_opens_window(clock):
+    rnd = random.Random(3)
+    limits = simulate(clock, subnet_rtt(lambda i: rnd.uniform(20, 150)))
+    assert limits[-1] == 500
+
+
+def test_queueing_holds_window_down(clock):
+    limits = simulate(clock, subnet_rtt(lambda i: 40.0), capacity=60)
+    tail = limits[-5000:]
+    assert max(tail) < 100 and sum(tail) / len(tail) < 80
+
+
+def test_timeouts_cut_window(clock):
+    c = m.AdaptiveConcurrency(4, 500)
+    c.window = 200.0
+    for _ in range(50):
+        clock[0] += 1.0
+        c.release({"ip": "10.0.0.1", "timeout_phase": "connect"})
+    assert c.limit == 4
+
+
+def test_subnet_keys():
+    assert m._subnet("10.1.2.3") == m._subnet("10.1.2.200") != m._subnet("10.1.3.3")
+    assert m._subnet("2001:db8::1") == m._subnet("2001:db8::ffff") != m._subnet("2001:db9::1")
@@ -0,0 +1,63 @@
+import socket, threading, time
+
+import pytest
+
+import ssh_tester_python3 as m
+
+
+@pytest.fixture
+def resolver(monkeypatch, tmp_path):
+    hosts = tmp_path / "hosts"
+    hosts.write_text("10.9.9.9 fixo fixo.lan\n::1 seis\n")
+    monkeypatch.setattr(m, "_hosts_file", lambda: str(hosts))
+    r = m.DnsResolver(workers=4)
+    r.calls = []
+    gate = r.gate = threading.Event()
+    gate.set()
+
+    def query(host):
+        r.calls.append(host)
+        gate.wait()
+        if host.endswith(".invalid"): raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, ("192.0.2.1", 0))]
+    monkeypatch.setattr(r, "_query", query)
+    return r
+
+
+def test_literals_and_hosts_file_skip_the_query(resolver):
+    assert resolver.resolve("10.1.1.1") == [(socket.AF_INET, ("10.1.1.1", 0))]
+    assert resolver.resolve("[2001:db8::1]")[0][0] == socket.AF_INET6
+    assert resolver.resolve("FIXO.lan") == [(socket.AF_INET, ("10.9.9.9", 0))]
+    assert resolver.resolve("seis")[0][1][0] == "::1"
+    assert resolver.calls == []
+
+
+def test_concurrent_lookups_share_one_query_and_cache(resolver):
+    resolver.gate.clear()
+    futs = [resolver.resolve_future("web") for _ in range(5)]
+    assert len(set(map(id, futs))) == 1
+    resolver.gate.set()
+    assert futs[0].result(5) == [(socket.AF_INET, ("192.0.2.1", 0))]
+    time.sleep(0.05)   # _store roda no callback do Future
+    assert resolver.resolve("WEB")[0][1][0] == "192.0.2.1" and resolver.calls == ["web"]
+
+
+def test_failures_are_cached_and_raised_fresh(resolver):
+    errs = []
+    for _ in range(2):
+        with pytest.raises(socket.gaierror) as e: resolver.resolve("x.invalid")
+        errs.append(e.value)
+    assert resolver.calls == ["x.invalid"] and errs[0] is not errs[1]
+
+
+def test_timeout_and_stop(resolver):
+    resolver.gate.clear()
+    with pytest.raises(socket.timeout): resolver.resolve("lento", timeout=0.1)
+    stop = threading.Event(); stop.set()
+    with pytest.raises(m.ScanCancelled): resolver.resolve("lento", stop=stop)
+    resolver.gate.set()
+
+
+def test_no_tcp_address_is_a_resolution_failure(monkeypatch):
+    monkeypatch.setattr(socket, "getaddrinfo", lambda *a, **kw: [])
+    with pytest.raises(socket.gaierror): m.DnsResolver(workers=1).resolve("sem-endereco.example")
@@ -0,0 +1,113 @@
+import base64, socket, threading, time
+
+import paramiko
+
+import ssh_tester_python3 as m
+
+
+def test_every_shard_gets_work(tarpit):
+    # alvos que nunca respondem: cada shard fica com as vagas cheias até o Parar
+    e = m.ProcessScanEngine(m.ScanOptions(username="a", password="b"), 4, processes=2)
+    rows = []
+    th = threading.Thread(target=e.run, args=([("127.0.0.1", tarpit)] * 200, rows.append))
+    th.start()
+    try:
+        end = time.monotonic() + 30
+        while time.monotonic() < end:
+            busy = {i: w[1] for i, w in e.windows.items()}
+            if len(busy) == 2 and all(busy.values()): break
+            time.sleep(0.1)
+        assert len(busy) == 2 and all(busy.values()), busy
+    finally:
+        e.stop()
+        th.join(15)
+    assert not th.is_alive()
+
+
+def test_shards_send_full_host_keys_to_parent(tmp_path, ssh_server):
+    m.HOST_KEYS.clear()
+    opts = m.ScanOptions(mode="methods", username="u")
+    rows = []
+    m.ProcessScanEngine(opts, workers=4, processes=2).run([ssh_server] * 8, rows.append)
+    fps = {r["fingerprint"] for r in rows}
+    assert len(rows) == 8 and len(fps) == 1 and "" not in fps
+    for r in rows: m.HOST_KEYS.note(r)
+    out = tmp_path / "keys.txt"
+    with open(out, "w") as f: assert m.HOST_KEYS.export(f) == 1
+    ktype, blob, fp, hosts = out.read_text().split()
+    assert fp in fps and hosts == "8"
+    key = paramiko.PKey.from_type_string(ktype, base64.b64decode(blob))
+    assert m.sha256_fingerprint(key) == fp
+
+
+def test_key_dedup_spans_shards(ssh_server):
+    m.KEY_CLAIMS.clear()
+    opts = m.ScanOptions(mode="methods", username="u", dedup="key")
+    # nomes distintos do mesmo servidor (inet_aton aceita todas as grafias)
+    names = ["127.0.0.1", "localhost", "127.1", "127.0.1", "2130706433", "0x7f000001", "0177.0.0.1", "127.000.000.001"]
+    rows = []
+    m.ProcessScanEngine(opts, workers=2, processes=2).run([(h, ssh_server[1]) for h in names], rows.append)
+    assert sorted(r["host"] for r in rows) == sorted(names)
+    leaders = [m.target_label(r["host"], r["port"]) for r in rows if not r["inherited_from"]]
+    assert len(leaders) == 1   # a mesma chave: um só líder, em qualquer shard
+    assert {r["inherited_from"] for r in rows if r["inherited_from"]} == set(leaders)
+
+
+def serve(handler):
+    """Servidor TCP local; handler(conn) roda numa thread por conexão."""
+    lsock = socket.socket()
+    lsock.bind(("127.0.0.1", 0))
+    lsock.listen(64)
+
+    def loop():
+        while True:
+            conn = lsock.accept()[0]
+            threading.Thread(target=handler, args=(conn,), daemon=True).start()
+    threading.Thread(target=loop, daemon=True).start()
+    return lsock.getsockname()[1]
+
+
+def refused_port():
+    s = socket.socket(); s.bind(("127.0.0.1", 0)); port = s.getsockname()[1]; s.close()
+    return port
+
+
+def not_ssh(conn):
+    conn.sendall(b"HTTP/1.1 400 Bad Request\r\n\r\n"); time.sleep(0.2); conn.close()
+
+
+def bad_kex(conn):
+    conn.sendall(b"SSH-2.0-fake\r\n"); conn.recv(100); time.sleep(0.1); conn.sendall(b"\0" * 64); conn.close()
+
+
+ENGINES = {
+    "threads": lambda o: m.ThreadScanEngine(o, 4),
+    "prefilter": lambda o: m.ThreadScanEngine(o, 4, prefilter=True),
+    "asyncio": lambda o: m.AsyncScanEngine(o, 4),
+    "processes": lambda o: m.ProcessScanEngine(o, 4, processes=2),
+}
+
+
+def shape(r):
+    """Linha sem os tempos medidos: só se cada coluna de tempo veio preenchida."""
+    timed = ("latency_ms", "time_ms") + m.PHASE_COLUMNS
+    return {c: (r.get(c, "") != "") if c in timed else r.get(c, "") for c in m.RESULT_COLUMNS if c != "key_hosts"}
+
+
+def test_engines_write_the_same_rows(tarpit, ssh_server):
+    m.RESOLVER.cache.clear()
+    targets = [ssh_server, ("127.0.0.1", refused_port()), ("127.0.0.1", serve(not_ssh)),
+               ("127.0.0.1", serve(bad_kex)), ("127.0.0.1", int(tarpit)), ("nao-existe.invalid", 22)]
+    opts = m.ScanOptions(username="u", password="p", phase_budgets=dict(m.PHASE_BUDGETS, banner=1))
+    out = {}
+    for name, make in ENGINES.items():
+        rows = []
+        make(opts).run(targets, rows.append)
+        out[name] = sorted((shape(r) for r in rows if not r.get("partial")), key=lambda r: (r["host"], r["port"]))
+    assert len(out["threads"]) == len(targets)
+    by_port = {r["port"]: r for r in out["threads"]}
+    assert by_port[ssh_server[1]]["ok"] and by_port[ssh_server[1]]["auth_method"] == "password"
+    assert by_port[targets[1][1]]["error"] == "[Errno 111] Connection refused" and by_port[targets[1][1]]["connect_ms"]
+    assert by_port[tarpit]["timeout_phase"] == "banner"
+    for name, rows in out.items():
+        assert rows == out["threads"], name
@@ -0,0 +1,24 @@
+import csv, os, signal, subprocess, sys, time
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ssh_tester_python3.py")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGINT para o grupo de processos")
+@pytest.mark.parametrize("flags", [[], ["--adaptive"], ["--processes", "2", "--dedup", "addr"], ["--engine", "asyncio"]])
+def test_ctrl_c_keeps_cancelled_rows(tarpit, tmp_path, flags):
+    hosts, out = tmp_path / "hosts.txt", tmp_path / "out.csv"
+    hosts.write_text(f"127.0.0.1:{tarpit}\n")
+    p = subprocess.Popen([sys.executable, SCRIPT, "--headless", "-f", str(hosts), "-o", str(out),
+                          "-u", "a", "-p", "b", *flags],
+                         stderr=subprocess.PIPE, text=True, start_new_session=True)
+    end = time.monotonic() + 30
+    while not tarpit.conns and time.monotonic() < end: time.sleep(0.05)
+    assert tarpit.conns
+    time.sleep(0.3)
+    os.killpg(p.pid, signal.SIGINT)   # como o Ctrl+C do terminal: todo o grupo recebe
+    err = p.communicate(timeout=30)[1]
+    rows = list(csv.DictReader(out.open(encoding="utf-8")))
+    assert [(r["host"], r["error"]) for r in rows] == [("127.0.0.1", "Cancelado")], err
+    assert "Cancelado: 1 host(s)" in err
@@ -0,0 +1,58 @@
+import base64, hmac, os, time
+
+import ssh_tester_python3 as m
+
+KEY_A, KEY_B, KEY_C = "AAAAkeyA", "AAAAkeyB", "AAAAkeyC"
+
+
+def hashed(name):
+    salt = os.urandom(20)
+    digest = hmac.digest(salt, name.encode(), "sha1")
+    return f"|1|{base64.b64encode(salt).decode()}|{base64.b64encode(digest).decode()}"
+
+
+def index(tmp_path, lines):
+    path = tmp_path / "known_hosts"
+    path.write_text("".join(l + "\n" for l in lines))
+    return m.KnownHostsIndex(str(path))
+
+
+def test_plain_and_hashed_statuses(tmp_path):
+    kh = index(tmp_path, [
+        "alpha,10.0.0.1 ssh-ed25519 " + KEY_A,
+        hashed("[beta]:2222") + " ssh-ed25519 " + KEY_B,
+        "@revoked * ssh-ed25519 " + KEY_C,
+        "# comentário",
+    ])
+    assert kh.check(["alpha"], "ssh-ed25519", KEY_A) == "match"
+    assert kh.check(["x", "10.0.0.1"], "ssh-ed25519", KEY_A) == "match"
+    assert kh.check(["alpha"], "ssh-ed25519", KEY_B) == "mismatch"
+    assert kh.check(["alpha"], "ssh-rsa", KEY_B) == "unknown"   # nenhuma linha hasheada de rsa
+    assert kh.check(["[beta]:2222"], "ssh-ed25519", KEY_B) == "match"
+    assert kh.check(["[beta]:2222"], "ssh-ed25519", KEY_A) == "unverified"
+    assert kh.check(["[beta]:2222"], "ssh-ed25519", KEY_A, sweep=True) == "mismatch"
+    assert kh.check(["gamma"], "ssh-ed25519", KEY_A, sweep=True) == "unknown"
+    assert kh.check(["alpha"], "ssh-ed25519", KEY_C) == "revoked"
+
+
+def test_remember_and_flush(tmp_path):
+    kh = index(tmp_path, [hashed("old") + " ssh-ed25519 " + KEY_A])
+    kh.remember("new", "ssh-ed25519", KEY_B)
+    assert kh.check(["new"], "ssh-ed25519", KEY_B) == "match"
+    kh.flush()
+    lines = (tmp_path / "known_hosts").read_text().splitlines()
+    assert len(lines) == 2 and lines[1].startswith("|1|")   # mesmo formato do arquivo
+    assert m.KnownHostsIndex(kh.path).check(["new"], "ssh-ed25519", KEY_B) == "match"
+
+
+def test_large_file_lookups_do_not_scan(tmp_path):
+    n = 50_000
+    lines = [hashed(f"h{i}") + f" ssh-ed25519 AAAAunique{i}" for i in range(n)]
+    lines += [f"clone{i} ssh-ed25519 {KEY_A}" for i in range(n)]   # imagem clonada: a mesma chave
+    kh = index(tmp_path, lines)
+    t = time.perf_counter()
+    for i in range(100):
+        assert kh.check([f"new{i}"], "ssh-ed25519", f"AAAAother{i}") == "unverified"
+        assert kh.check([f"clone{i}"], "ssh-ed25519", KEY_A) == "match"
+        assert kh.check([f"h{i}"], "ssh-ed25519", f"AAAAunique{i}") == "match"
+    assert time.perf_counter() - t < 0.5   # varrer os 50k salts uma vez já passaria disto
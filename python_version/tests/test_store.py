@@ -0,0 +1,61 @@
+import random
+from array import array
+
+import ssh_tester_python3 as m
+
+
+def result(i, **kw):
+    r = m.new_result(f"h{i}", 22, f"10.0.{i // 256}.{i % 256}")
+    r.update(ok=i % 3 == 0, latency_ms=(i * 37) % 100 if i % 5 else "", error="" if i % 3 == 0 else f"erro {i % 4}",
+             fingerprint=f"SHA256:k{i % 7}", **kw)
+    return r
+
+
+def test_store_round_trip():
+    store = m.ResultStore()
+    rs = [result(i) for i in range(50)]
+    for r in rs: store.append(r)
+    for i, r in enumerate(rs):
+        vals = dict(zip(m.RESULT_COLUMNS, store.values(i)))
+        assert vals["ok"] == ("✔" if r["ok"] else "✖")
+        assert vals["latency_ms"] == r["latency_ms"] and vals["error"] == r["error"]
+        assert store[i].host == r["host"] and store[i].ip == r["ip"]
+    store.update(4, dict(rs[4], ok=True, error=""))
+    assert store.get(4, "ok") == "✔" and store.get(4, "error") == ""
+    assert len(store.tables["error"].strings) == 5   # "" e "erro 0".."erro 3", uma vez cada
+
+
+def test_sort_keys_and_recount():
+    store = m.ResultStore()
+    for i in range(300): store.append(result(i))
+    lat = store.sort_keys("latency_ms")
+    assert sorted(range(300), key=lat.__getitem__)[-1] % 5 == 0   # vazio por último
+    ip = store.sort_keys("ip")
+    assert sorted(range(300), key=ip.__getitem__) == list(range(300))   # numérica, não textual
+    changed = store.recount_keys({"SHA256:k0": 9})
+    assert changed == [i for i in range(300) if i % 7 == 0]
+    assert store.get(7, "key_hosts") == 9 and lat is store.sort_keys("latency_ms")
+
+
+def test_sorted_index_and_merge():
+    rnd = random.Random(1)
+    keys = [rnd.randrange(20) for _ in range(500)]
+    key = lambda row: (m.Descending(keys[row]), row)   # como a chave composta da GUI
+    order = array("I", sorted(range(400), key=key))
+    order = m.merge_sorted(order, sorted(range(400, 500), key=key), key)
+    assert list(order) == sorted(range(500), key=key)
+    for row in (0, 250, 499):
+        assert order[m.sorted_index(order, row, key)] == row
+
+
+def test_filter_index_incremental():
+    fi = m.FilterIndex()
+    rows = [("web1", "✔", "ok"), ("db1", "✖", "timeout"), ("web2", "✖", "refused")]
+    for vals in rows: fi.add(vals)
+    assert fi.set_needle("web") == ([], [1])
+    assert fi.set_needle("web2") == ([], [0])
+    assert fi.set_needle("w") == ([0], [])
+    assert fi.set_needle("✖") == ([1], [0])   # nem contém nem está contido: varre tudo
+    assert list(fi.shown) == [1, 2]
+    assert fi.update(0, ("web1", "✖", "agora falhou")) is True
+    assert list(fi.shown) == [0, 1, 2] and fi.update(0, ("web1", "✖", "x")) is None
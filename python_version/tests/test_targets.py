@@ -0,0 +1,31 @@
+import ssh_tester_python3 as m
+
+
+def test_target_syntax():
+    lines = ["# comentário", "", "srv", "srv:2222", "db:22,8000-8002", "[2001:db8::1]:2200", "2001:db8::2",
+             "10.0.0.0/30", "10.1.2.250-252", "a-b.example"]
+    assert list(m.parse_targets(lines, 22)) == [
+        ("srv", 22), ("srv", 2222), ("db", 22), ("db", 8000), ("db", 8001), ("db", 8002),
+        ("2001:db8::1", 2200), ("2001:db8::2", 22), ("10.0.0.1", 22), ("10.0.0.2", 22),
+        ("10.1.2.250", 22), ("10.1.2.251", 22), ("10.1.2.252", 22), ("a-b.example", 22)]
+
+
+def test_ports_and_counts():
+    assert m.parse_ports("", 22) == [22]
+    assert m.parse_ports("x,0-2,2", 22) == [1, 2]
+    assert m.split_target("[::1]", 2222) == ("::1", [2222])
+    lines = ["10.0.0.0/16:22,2222", "2001:db8::/120", "10.0.0.5-10.0.1.4", "host"]
+    assert m.count_targets(lines, 22) == 65534 * 2 + 255 + 256 + 1
+
+
+def test_repeats_dropped_across_spellings():
+    seen = m.SeenTargets()
+    out = list(m.parse_targets(["10.0.0.1", "10.0.0.0/30", "HOST", "host:22", "host:2222"], 22, seen))
+    assert out == [("10.0.0.1", 22), ("10.0.0.2", 22), ("HOST", 22), ("host", 2222)]
+    assert not seen.add("10.0.0.2", 22) and seen.add("10.0.0.2", 23)
+
+
+def test_expansion_is_lazy():
+    it = m.parse_targets(["10.0.0.0/8"], 22)
+    assert next(it) == ("10.0.0.1", 22)
+    assert m.host_count("10.0.0.0/8") == 2 ** 24 - 2